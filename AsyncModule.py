@@ -0,0 +1,70 @@
+import asyncio
+import queue
+import threading
+
+from PipelineModule import DROP_OLDEST, Pipeline
+
+
+def _get(q, stopped, poll=0.1):
+    """Blocking get that gives up once stopped is set, so no executor thread outlives the stream"""
+    while not stopped.is_set():
+        try:
+            return q.get(timeout=poll)
+        except queue.Empty:
+            pass
+    return None
+
+
+async def stream(detect, source, maxsize=1, dropPolicy=DROP_OLDEST, metrics=None, executor=None):
+    """Async iterator of (frameNo, timestamp, img, result) of detect(img) over every frame of source.
+
+    Capture and detection run on the threads of a Pipeline, the event loop only ever waits for
+    its output queue through `executor` (the loop's default one unless given). Backpressure is
+    the Pipeline's: with dropPolicy="latest" a consumer that falls behind gets the newest frames
+    and the ones in between are dropped, with dropPolicy="block" capture waits for the consumer.
+    Leaving the async for loop stops the pipeline, an exception raised by the source or by
+    detect ends the stream and is raised in the consumer.
+    """
+    loop = asyncio.get_running_loop()
+    pipeline = Pipeline(source, detect, maxsize=maxsize, dropPolicy=dropPolicy, metrics=metrics).start()
+    stopped = threading.Event()
+    try:
+        while True:
+            item = await loop.run_in_executor(executor, _get, pipeline.renderQueue, stopped)
+            if item is None:
+                break
+            yield item
+        if pipeline.error is not None:
+            raise pipeline.error
+    finally:
+        stopped.set()
+        await loop.run_in_executor(executor, pipeline.stop)
+
+
+async def detectAsync(detect, img, executor=None):
+    """Runs detect(img) on `executor` and returns its result without blocking the event loop.
+
+    A detector must not run two frames at once, give each one its own single-thread executor
+    when several requests can arrive together.
+    """
+    return await asyncio.get_running_loop().run_in_executor(executor, detect, img)
+
+
+async def main():
+    from CameraModule import CameraSource
+    from HandTrackingModules import HandDetector
+
+    cap = CameraSource(0).start()
+    detector = HandDetector()
+    try:
+        async for frameNo, timestamp, img, result in detector.stream(cap):
+            print(frameNo, len(result.landmarks))
+    finally:
+        cap.release()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
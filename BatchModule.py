@@ -0,0 +1,223 @@
+import argparse
+import inspect
+import os
+import pickle
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+import cv2
+import numpy as np
+
+
+MODELS = ("face", "hand", "pose")
+
+
+def detectorClass(model):
+    """FaceDetector, HandDetector or poseDetector for a model name"""
+    if model == "face":
+        from FaceDetectionModule import FaceDetector
+        return FaceDetector
+    if model == "hand":
+        from HandTrackingModules import HandDetector
+        return HandDetector
+    if model == "pose":
+        from pose.PoseModule import poseDetector
+        return poseDetector
+    raise ValueError(f"unknown model {model!r}, expected one of {MODELS}")
+
+
+def makeDetector(model, **params):
+    """Builds a FaceDetector, HandDetector or poseDetector from its constructor arguments"""
+    return detectorClass(model)(**params)
+
+
+class DetectorPool:
+    """Idle detectors kept per model and constructor arguments, so asking for a config again hands
+    back an already built and warmed-up graph instead of paying for a new one.
+
+    A detector imports mediapipe and builds its graph on first use; `built` tells whether that
+    happened and warmup() does it ahead of time, running one blank frame through so the first
+    real frame is not slow. Every detector is lent to one user at a time; acquire() only builds a
+    new one when all the detectors of that config are in use, and warms up whatever it hands out.
+
+    release() calls the detector's reset() so nothing of one user's frames carries over to the
+    next: its ROI, tracker, motion gate and last results start over, and a graph that tracks
+    between frames is closed, since MediaPipe cannot clear its tracking state. Face detection and
+    static image mode graphs hold no such state and stay warm.
+    """
+
+    def __init__(self, warmup=True):
+        self.warmup = warmup
+        self._idle = {}
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    def key(self, model, params):
+        """(model, every constructor argument with defaults filled in), so {} and explicit defaults match"""
+        bound = inspect.signature(detectorClass(model)).bind_partial(**params)
+        bound.apply_defaults()
+        return (model,) + tuple(sorted(bound.arguments.items()))
+
+    def acquire(self, model, **params):
+        key = self.key(model, params)
+        with self._lock:
+            idle = self._idle.get(key)
+            detector = idle.pop() if idle else None
+        if detector is None:
+            detector = makeDetector(model, **params)
+            with self._lock:
+                self._keys[id(detector)] = key
+        # new detectors, and pooled ones whose tracking graph reset() closed, are built here
+        # rather than on the caller's first frame
+        if self.warmup and not detector.built:
+            detector.warmup()
+        return detector
+
+    def release(self, detector):
+        detector.reset()
+        with self._lock:
+            self._idle.setdefault(self._keys[id(detector)], []).append(detector)
+
+    @contextmanager
+    def borrow(self, model, **params):
+        detector = self.acquire(model, **params)
+        try:
+            yield detector
+        finally:
+            self.release(detector)
+
+    def clear(self):
+        """Drops every idle detector, the ones still lent out are forgotten when released"""
+        with self._lock:
+            for detectors in self._idle.values():
+                for detector in detectors:
+                    del self._keys[id(detector)]
+            self._idle.clear()
+
+
+# shared by everything in the process, including the segments a pool worker processes one after another
+detectorPool = DetectorPool()
+
+
+def detectFrame(detector, model, img):
+    """Runs one frame through the detector and returns a picklable result without drawing"""
+    if model == "face":
+        img, bboxs = detector.findFaces(img, draw=False)
+        return [[id, bbox, float(score[0])] for id, bbox, score in bboxs]
+    if model == "hand":
+        detector.findHands(img, draw=False)
+    else:
+        detector.findPose(img, draw=False)
+    return detector.findPositions(img)
+
+
+def detectLandmarks(detector, model, img):
+    """Like detectFrame but keeps full precision: (N, 5) float32 [x, y, w, h, score] boxes for
+    faces, findLandmarks' (N, 21|33|25, 3) float32 pixel x, y, z for hands and pose"""
+    if model == "face":
+        img, bboxs = detector.findFaces(img, draw=False)
+        return np.array([list(bbox) + [score[0]] for id, bbox, score in bboxs], np.float32).reshape(-1, 5)
+    if model == "hand":
+        detector.findHands(img, draw=False)
+    else:
+        detector.findPose(img, draw=False)
+    return detector.findLandmarks(img)
+
+
+def resultShape(model, params=None):
+    """Shape of one detection in detectLandmarks' output for a model and its constructor arguments"""
+    if model == "face":
+        return (5,)
+    if model == "hand":
+        return (21, 3)
+    # the upBody pose graph only returns the first 25 of the 33 landmarks
+    return (25 if (params or {}).get("upBody") else 33, 3)
+
+
+def countFrames(path):
+    cap = cv2.VideoCapture(path)
+    frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    return frames
+
+
+def splitSegments(frames, segments):
+    """Splits range(frames) into at most `segments` contiguous (start, end) pairs"""
+    segments = max(1, min(segments, frames))
+    bounds = [frames * i // segments for i in range(segments + 1)]
+    return [(start, end) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+
+def processSegment(path, model, start, end, warmup=30, params=None, landmarks=False):
+    """Processes frames [start, end) of a video in the calling process.
+
+    The detector is first fed up to `warmup` frames before `start` whose results are thrown
+    away, so MediaPipe's tracking state has settled by the first frame that is kept.
+    With landmarks set every frame gives detectLandmarks' arrays instead of detectFrame's.
+    """
+    detect = detectLandmarks if landmarks else detectFrame
+    first = max(0, start - warmup)
+    cap = cv2.VideoCapture(path)
+    if first:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, first)
+    results = []
+    with detectorPool.borrow(model, **(params or {})) as detector:
+        for frameNo in range(first, end):
+            success, img = cap.read()
+            if not success:
+                break
+            result = detect(detector, model, img)
+            if frameNo >= start:
+                results.append(result)
+    cap.release()
+    return results
+
+
+def _processSegment(args):
+    return processSegment(*args)
+
+
+def processVideo(path, model="pose", workers=None, warmup=30, params=None, landmarks=False):
+    """Processes a whole video on a pool of worker processes, one detector per process.
+
+    Returns the per-frame results in frame order, the same list a sequential run produces.
+    """
+    workers = workers or os.cpu_count() or 1
+    frames = countFrames(path)
+    if frames <= 0:
+        # streams that do not report a length cannot be split
+        return processSegment(path, model, 0, sys.maxsize, warmup, params, landmarks)
+    segments = splitSegments(frames, workers)
+    # the reported length is only an estimate for many containers, the last segment reads to the end
+    segments[-1] = (segments[-1][0], sys.maxsize)
+    jobs = [(path, model, start, end, warmup, params, landmarks) for start, end in segments]
+    results = []
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs) or 1)) as pool:
+        for segment in pool.map(_processSegment, jobs):
+            results.extend(segment)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a detector over a video file on every core")
+    parser.add_argument("video")
+    parser.add_argument("--model", choices=MODELS, default="pose")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--warmup", type=int, default=30,
+                        help="frames replayed before each segment to settle tracking")
+    parser.add_argument("--output", default=None, help="pickle file for the per-frame results")
+    args = parser.parse_args()
+
+    sTime = time.time()
+    results = processVideo(args.video, args.model, args.workers, args.warmup)
+    eTime = time.time()
+    print(f'{len(results)} frames in {eTime - sTime:.1f}s')
+    if args.output:
+        with open(args.output, "wb") as f:
+            pickle.dump(results, f)
+
+
+if __name__ == "__main__":
+    main()
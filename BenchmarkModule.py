@@ -0,0 +1,170 @@
+import argparse
+import json
+import platform
+import time
+import cv2
+import numpy as np
+
+from BatchModule import MODELS, makeDetector
+from PreprocessModule import FramePreprocessor
+from RenderModule import Renderer
+
+
+STAGES = ("capture", "preprocess", "inference", "postprocess", "draw")
+
+
+def syntheticFrames(width=1280, height=720, seed=0):
+    """Endless deterministic noise frames scrolling sideways, for machines without fixture clips"""
+    rng = np.random.default_rng(seed)
+    base = rng.integers(0, 256, (height, width, 3), np.uint8)
+    i = 0
+    while True:
+        yield np.roll(base, i * 8, axis=1)
+        i += 1
+
+
+def videoFrames(path):
+    cap = cv2.VideoCapture(path)
+    try:
+        while True:
+            success, img = cap.read()
+            if not success:
+                break
+            yield img
+    finally:
+        cap.release()
+
+
+def infer(detector, model, img, imgRGB):
+    if model == "face":
+        detector.findFaces(img, False, imgRGB)
+    elif model == "hand":
+        detector.findHands(img, False, imgRGB)
+    else:
+        detector.findPose(img, False, imgRGB)
+
+
+def postprocess(detector, model, img):
+    if model == "face":
+        return detector.findResult()
+    return detector.findResult(img)
+
+
+def summarize(samples):
+    """p50/p95/p99 and mean of a list of durations in seconds, reported in milliseconds"""
+    if not samples:
+        return None
+    ms = np.asarray(samples) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {"p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99), "mean_ms": float(ms.mean())}
+
+
+def runBenchmark(model, frames, count=300, warmup=10, width=None, params=None):
+    """Times every stage of `count` frames through one detector, after `warmup` untimed frames"""
+    detector = makeDetector(model, **(params or {}))
+    renderer = Renderer()
+    preprocessor = None
+    inferenceWidth = None
+    timings = {stage: [] for stage in STAGES}
+    detections = 0
+    done = 0
+    frames = iter(frames)
+    sTime = time.perf_counter()
+    while done < warmup + count:
+        t0 = time.perf_counter()
+        img = next(frames, None)
+        if img is None:
+            break
+        t1 = time.perf_counter()
+        if preprocessor is None:
+            preprocessor = FramePreprocessor(width or img.shape[1])
+            inferenceWidth = preprocessor.outputSize(img.shape)[0]
+        imgRGB = preprocessor.process(img)
+        t2 = time.perf_counter()
+        infer(detector, model, img, imgRGB)
+        t3 = time.perf_counter()
+        result = postprocess(detector, model, img)
+        t4 = time.perf_counter()
+        renderer.draw(img, [result])
+        t5 = time.perf_counter()
+
+        done += 1
+        if done == warmup:
+            sTime = t5
+        if done > warmup:
+            for stage, start, end in zip(STAGES, (t0, t1, t2, t3, t4), (t1, t2, t3, t4, t5)):
+                timings[stage].append(end - start)
+            detections += len(result[0])
+    measured = max(done - warmup, 0)
+    elapsed = time.perf_counter() - sTime
+    return {
+        "model": model,
+        "params": params or {},
+        "frames": measured,
+        "inference_width": inferenceWidth,
+        "throughput_fps": measured / elapsed if measured and elapsed > 0 else 0.0,
+        "detections_per_frame": detections / measured if measured else 0.0,
+        "stages": {stage: summarize(samples) for stage, samples in timings.items()},
+        "total": summarize([sum(times) for times in zip(*timings.values())]),
+    }
+
+
+def environment():
+    info = {"python": platform.python_version(), "machine": platform.machine(),
+            "opencv": cv2.__version__, "numpy": np.__version__}
+    try:
+        import mediapipe as mp
+        info["mediapipe"] = getattr(mp, "__version__", "unknown")
+    except ImportError:
+        pass
+    return info
+
+
+def compare(report, baseline):
+    """Prints p50/p95 changes per stage against an earlier report for the same models"""
+    for name, run in report["runs"].items():
+        old = baseline.get("runs", {}).get(name)
+        if old is None:
+            continue
+        print(f'{name}: {old["throughput_fps"]:.1f} -> {run["throughput_fps"]:.1f} fps')
+        for stage in STAGES + ("total",):
+            new = run["stages"].get(stage) if stage != "total" else run["total"]
+            prev = old["stages"].get(stage) if stage != "total" else old["total"]
+            if new and prev:
+                print(f'  {stage:<12} p50 {prev["p50_ms"]:7.2f} -> {new["p50_ms"]:7.2f} ms'
+                      f'   p95 {prev["p95_ms"]:7.2f} -> {new["p95_ms"]:7.2f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless per-stage benchmark of the detectors")
+    parser.add_argument("--model", choices=MODELS, action="append",
+                        help="may be given more than once, defaults to all models")
+    parser.add_argument("--video", default=None,
+                        help="fixture clip to replay, synthetic noise frames are used without one")
+    parser.add_argument("--size", default="1280x720", help="synthetic frame size WxH")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--width", type=int, default=None, help="inference width, defaults to the frame width")
+    parser.add_argument("--output", default=None, help="JSON file for the report")
+    parser.add_argument("--compare", default=None, help="earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    report = {"environment": environment(), "video": args.video, "runs": {}}
+    for model in args.model or MODELS:
+        frames = videoFrames(args.video) if args.video else syntheticFrames(width, height)
+        run = runBenchmark(model, frames, args.frames, args.warmup, args.width)
+        report["runs"][model] = run
+        print(f'{model}: {run["frames"]} frames, {run["throughput_fps"]:.1f} fps, '
+              f'p50 {run["total"]["p50_ms"] if run["total"] else 0:.2f} ms')
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+
+from BatchModule import MODELS, detectorClass, processVideo, resultShape
+
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "opencv-python-landmarks")
+
+
+def fileHash(path, chunkSize=1 << 20):
+    """blake2b digest of a file's content, so renamed or copied videos still hit the cache"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunkSize), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def resolveParams(model, params=None):
+    """Constructor arguments with every default filled in, so {} and explicit defaults share a key"""
+    bound = inspect.signature(detectorClass(model)).bind_partial(**(params or {}))
+    bound.apply_defaults()
+    return {name: value for name, value in bound.arguments.items() if name not in ("metrics", "tracker")}
+
+
+def cacheKey(videoHash, model, params, workers, warmup):
+    # workers and warmup decide where segments start and how settled tracking is there, so they
+    # change the results of tracking graphs
+    text = json.dumps({"video": videoHash, "model": model, "params": params, "workers": workers,
+                       "warmup": warmup}, sort_keys=True, default=repr)
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+class CachedLandmarks:
+    """Per-frame results of one cached run, memory-mapped straight from disk.
+
+    values holds every detection of every frame back to back, frame i owns the rows
+    values[offsets[i]:offsets[i + 1]]. For faces a row is [x, y, w, h, score], for hands and
+    pose it is a (21|33|25, 3) array of pixel x, y, z.
+    """
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.offsets = np.load(os.path.join(directory, "offsets.npy"), mmap_mode="r")
+        self.values = np.load(os.path.join(directory, "values.npy"), mmap_mode="r")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, frameNo):
+        return self.values[self.offsets[frameNo]:self.offsets[frameNo + 1]]
+
+    def counts(self):
+        """Number of detections in every frame"""
+        return np.diff(self.offsets)
+
+
+def writeCache(directory, results, meta):
+    """Stores a list of per-frame result arrays in the columnar layout CachedLandmarks reads.
+
+    Every writer fills its own temporary directory, so jobs that missed on the same key at once
+    do not share files; the first rename wins and the others keep its entry.
+    """
+    tmp = tempfile.mkdtemp(prefix=os.path.basename(directory) + ".", suffix=".tmp",
+                           dir=os.path.dirname(directory))
+    offsets = np.zeros(len(results) + 1, np.int64)
+    offsets[1:] = np.cumsum([len(result) for result in results])
+    rowShape = resultShape(meta["model"], meta["params"])
+    values = np.concatenate(results) if results else np.empty((0,) + rowShape, np.float32)
+    np.save(os.path.join(tmp, "offsets.npy"), offsets)
+    np.save(os.path.join(tmp, "values.npy"), values.astype(np.float32, copy=False))
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2, default=repr)
+    # renamed into place last so a crashed run never leaves a half-written entry behind
+    try:
+        os.rename(tmp, directory)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not os.path.exists(os.path.join(directory, "meta.json")):
+            raise
+
+
+def loadLandmarks(path, model="pose", params=None, cacheDir=CACHE_DIR, workers=None, warmup=30):
+    """Returns the CachedLandmarks of a video, running the detector over it first on a cache miss"""
+    params = resolveParams(model, params)
+    videoHash = fileHash(path)
+    workers = workers or os.cpu_count() or 1
+    directory = os.path.join(cacheDir, cacheKey(videoHash, model, params, workers, warmup))
+    if not os.path.exists(os.path.join(directory, "meta.json")):
+        results = processVideo(path, model, workers, warmup, params, landmarks=True)
+        meta = {"video": os.path.abspath(path), "videoHash": videoHash, "model": model,
+                "params": params, "workers": workers, "warmup": warmup, "frames": len(results),
+                "created": time.time()}
+        os.makedirs(cacheDir, exist_ok=True)
+        writeCache(directory, results, meta)
+    return CachedLandmarks(directory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or reuse the landmark cache of a video")
+    parser.add_argument("video")
+    parser.add_argument("--model", choices=MODELS, default="pose")
+    parser.add_argument("--params", default="{}", help='detector arguments as JSON, e.g. {"detectionCon": 0.7}')
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    sTime = time.time()
+    cached = loadLandmarks(args.video, args.model, json.loads(args.params), args.cache_dir, args.workers)
+    print(f'{len(cached)} frames, {int(cached.counts().sum())} detections in {time.time() - sTime:.1f}s')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import threading
+import time
+import cv2
+
+
+class CameraSource:
+    """A camera read on a background thread that only ever keeps the newest frame.
+
+    cv2.VideoCapture.read() blocks for up to a frame period and the driver queues frames
+    behind the one being read, so a slow consumer is always looking at the past. Here a thread
+    reads as fast as the camera delivers into a lock-protected slot, and consumers pick up
+    whatever is newest: readLatest() never blocks, read() waits only for a frame it has not
+    seen yet and keeps the (success, img) interface of VideoCapture, so a CameraSource can be
+    handed to Pipeline or anything else that reads a capture.
+
+    Resolution, FPS, FOURCC and the driver buffer size are set when the device is opened,
+    `settings` holds what the driver actually agreed to. After `maxFailures` failed reads in a
+    row the device is released and opened again, waiting `reconnectDelay` seconds at first and
+    twice as long after every further failure, up to `maxReconnectDelay`.
+    """
+
+    def __init__(self, device=0, width=None, height=None, fps=None, fourcc="MJPG", bufferSize=1,
+                 reconnect=True, maxFailures=5, reconnectDelay=0.5, maxReconnectDelay=5.0, metrics=None):
+        self.device = device
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.fourcc = fourcc
+        self.bufferSize = bufferSize
+        self.reconnect = reconnect
+        self.maxFailures = maxFailures
+        self.reconnectDelay = reconnectDelay
+        self.maxReconnectDelay = maxReconnectDelay
+        # optional MetricsRegistry that records read timings, overwritten frames and reconnects
+        self.metrics = metrics
+        self.settings = {}
+        self.frameNo = -1
+        self.dropped = 0
+        self.reconnects = 0
+        self._cap = None
+        self._img = None
+        self._timestamp = None
+        self._lastRead = -1
+        self._running = False
+        self._thread = None
+        self._cond = threading.Condition()
+
+    def open(self):
+        """Opens the device with the configured settings, returns whether it opened"""
+        cap = cv2.VideoCapture(self.device)
+        # FOURCC goes first, some backends only offer the larger sizes once MJPG is selected
+        if self.fourcc:
+            cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.fourcc))
+        if self.width:
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        if self.height:
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        if self.fps:
+            cap.set(cv2.CAP_PROP_FPS, self.fps)
+        if self.bufferSize:
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, self.bufferSize)
+        fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+        self.settings = {
+            "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            "fps": cap.get(cv2.CAP_PROP_FPS),
+            "fourcc": "".join(chr((fourcc >> 8 * i) & 0xFF) for i in range(4)),
+            "bufferSize": int(cap.get(cv2.CAP_PROP_BUFFERSIZE)),
+        }
+        if self._cap is not None:
+            self._cap.release()
+        self._cap = cap
+        return cap.isOpened()
+
+    def start(self):
+        if self._thread is None:
+            if self._cap is None:
+                self.open()
+            self._running = True
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        failures = 0
+        delay = self.reconnectDelay
+        while self._running:
+            sTime = time.perf_counter()
+            success, img = self._cap.read()
+            if self.metrics is not None:
+                self.metrics.observe("camera_read_seconds", time.perf_counter() - sTime)
+            if success:
+                failures = 0
+                delay = self.reconnectDelay
+                self._publish(img)
+                continue
+            failures += 1
+            if self.metrics is not None:
+                self.metrics.inc("camera_read_failures_total")
+            if failures < self.maxFailures:
+                continue
+            if not self.reconnect:
+                break
+            time.sleep(delay)
+            delay = min(delay * 2, self.maxReconnectDelay)
+            if not self._running:
+                break
+            self.open()
+            self.reconnects += 1
+            failures = 0
+            if self.metrics is not None:
+                self.metrics.inc("camera_reconnects_total")
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    def _publish(self, img):
+        with self._cond:
+            if self._lastRead < self.frameNo:
+                self.dropped += 1
+                if self.metrics is not None:
+                    self.metrics.inc("camera_dropped_frames_total")
+            self.frameNo += 1
+            self._img = img
+            self._timestamp = time.time()
+            self._cond.notify_all()
+
+    def readLatest(self):
+        """(frameNo, timestamp, img) of the newest frame without waiting, None before the first one.
+
+        The same frame comes back again until a newer one arrives, compare frameNo to tell.
+        """
+        with self._cond:
+            if self._img is None:
+                return None
+            self._lastRead = self.frameNo
+            return self.frameNo, self._timestamp, self._img
+
+    def read(self, timeout=None):
+        """Waits for a frame newer than the last one read, returns (success, img) like VideoCapture"""
+        if self._thread is None:
+            self.start()
+        with self._cond:
+            fresh = self._cond.wait_for(lambda: self.frameNo > self._lastRead or not self._running, timeout)
+            if not fresh or self.frameNo <= self._lastRead:
+                return False, None
+            self._lastRead = self.frameNo
+            return True, self._img
+
+    @property
+    def running(self):
+        """False once the reader thread gave up, e.g. at the end of a video file without reconnect"""
+        return self._running
+
+    def isOpened(self):
+        return self._cap is not None and self._cap.isOpened()
+
+    def release(self):
+        """Stops the reader thread and closes the device"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.release()
@@ -0,0 +1,75 @@
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from CameraModule import CameraSource
+from FaceDetectionModule import FaceDetector
+from HandTrackingModules import HandDetector
+from PipelineModule import Pipeline
+from PreprocessModule import FramePreprocessor
+from RenderModule import DisplaySink, Renderer, hasDisplay
+from pose import PoseModule as pm
+
+
+# FaceResult, HandResult and PoseResult of the three detectors' detect()
+CombinedResult = namedtuple("CombinedResult", ["faces", "hands", "pose"])
+
+
+class CombinedDetector:
+    """Runs face, hand and pose detection on one frame at the same time.
+
+    The frame is resized and converted to RGB once and shared by all three detectors, which run
+    on a thread pool since MediaPipe releases the GIL inside process(). None of them draws, the
+    overlays are left to a Renderer.
+    """
+
+    def __init__(self, width=640, faceDetector=None, handDetector=None, poseDetector=None):
+        self.faceDetector = faceDetector or FaceDetector()
+        self.handDetector = handDetector or HandDetector()
+        self.poseDetector = poseDetector or pm.poseDetector()
+        self.preprocessor = FramePreprocessor(width)
+        self.pool = ThreadPoolExecutor(3)
+        self.renderer = Renderer()
+
+    def detect(self, img):
+        """Returns the CombinedResult of one frame, img is left untouched"""
+        imgRGB = self.preprocessor.process(img)
+        faces = self.pool.submit(self.faceDetector.detect, img, imgRGB)
+        hands = self.pool.submit(self.handDetector.detect, img, imgRGB)
+        pose = self.pool.submit(self.poseDetector.detect, img, imgRGB)
+        return CombinedResult(faces.result(), hands.result(), pose.result())
+
+    def findAll(self, img, draw=True):
+        """detect() that also returns a copy of img with the results drawn on it when draw is set"""
+        result = self.detect(img)
+        if draw:
+            img = self.renderer.draw(img, result).copy()
+        return img, result
+
+    def close(self):
+        self.pool.shutdown()
+
+
+def main():
+    cap = CameraSource(0).start()
+    pTime = 0
+    detector = CombinedDetector()
+    renderer = Renderer([DisplaySink("Image")] if hasDisplay() else [])
+
+    def render(img, result):
+        nonlocal pTime
+        cTime = time.time()
+        fps = 1 / max(cTime - pTime, 1e-6)
+        pTime = cTime
+        if not renderer.active:
+            print(f'FPS: {int(fps)}', len(result.faces.boxes), len(result.hands.landmarks), len(result.pose.landmarks))
+        return renderer.render(img, result, fps)
+
+    Pipeline(cap, detector.detect, render).run()
+    cap.release()
+    renderer.close()
+    detector.close()
+
+
+if __name__ == "__main__":
+    main()
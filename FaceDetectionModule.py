@@ -1,21 +1,92 @@
+from collections import namedtuple
 import cv2
-import mediapipe as mp
+import numpy as np
 import time
 
+import AsyncModule
+from MotionModule import MotionGate
+from PipelineModule import Pipeline, BLOCK, DROP_OLDEST
+from RenderModule import DisplaySink, Renderer, hasDisplay
+from RoiModule import RoiTracker
+
+
+# boxes: (N, 4) int32 pixel x, y, w, h, scores: (N,) float32, ids: tracker ids or detection order
+FaceResult = namedtuple("FaceResult", ["boxes", "scores", "ids"])
+
 
 class FaceDetector():
-    def __init__(self, minDetectionCon=0.5):
+    def __init__(self, minDetectionCon=0.5, roiInterval=0, roiMargin=0.5, metrics=None, tracker=None,
+                 motionGate=None):
 
         self.minDetectionCon = minDetectionCon
 
-        self.mpFaceDetection = mp.solutions.face_detection
-        self.mpDraw = mp.solutions.drawing_utils
-        self.faceDetection = self.mpFaceDetection.FaceDetection(self.minDetectionCon)
+        # the graph is built on first use, see DetectorPool
+        self.mpFaceDetection = None
+        self.mpDraw = None
+        self._faceDetection = None
+        # roiInterval > 1 runs full-frame detection only every roiInterval frames, see RoiTracker
+        self.roi = RoiTracker(roiInterval, roiMargin, minDetectionCon) if roiInterval > 1 else None
+        # optional MetricsRegistry that records per-call timings and detection counts
+        self.metrics = metrics
+        # optional SubjectTracker, bboxs then carry stable ids instead of the detection order
+        self.tracker = tracker
+        # optional MotionGate, see MotionModule
+        self.motionGate = motionGate
+
+    @property
+    def faceDetection(self):
+        if self._faceDetection is None:
+            import mediapipe as mp
+            self.mpFaceDetection = mp.solutions.face_detection
+            self.mpDraw = mp.solutions.drawing_utils
+            self._faceDetection = self.mpFaceDetection.FaceDetection(self.minDetectionCon)
+        return self._faceDetection
+
+    @property
+    def built(self):
+        return self._faceDetection is not None
+
+    def configure(self, **params):
+        """Changes constructor settings such as minDetectionCon, the graph is rebuilt on the next frame"""
+        for name, value in params.items():
+            if name != "minDetectionCon":
+                raise TypeError(f"{name!r} cannot be configured")
+            setattr(self, name, value)
+        if self._faceDetection is not None:
+            self._faceDetection.close()
+            self._faceDetection = None
+
+    def reset(self):
+        """Forgets the frames seen so far, see DetectorPool"""
+        for state in (self.roi, self.tracker, self.motionGate):
+            if state is not None:
+                state.reset()
+        self.results = None
+        self.bboxs = []
 
-    def findFaces(self, img, draw=True):
+    def warmup(self, size=(480, 640)):
+        """Builds the graph ahead of the first frame, see DetectorPool"""
+        self.faceDetection.process(np.zeros(tuple(size) + (3,), np.uint8))
+        return self
 
-        imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        self.results = self.faceDetection.process(imgRGB)
+    def findFaces(self, img, draw=True, imgRGB=None):
+        # imgRGB: see FramePreprocessor
+        sTime = time.perf_counter()
+        if self.motionGate is not None and not self.motionGate.moved(img):
+            if self.metrics is not None:
+                self.metrics.inc("face_skipped_frames_total")
+        elif self.roi is None:
+            if imgRGB is None:
+                imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+            self.results = self.faceDetection.process(imgRGB)
+        else:
+            self.roi.nextCrop()
+            if imgRGB is None:
+                imgRGB = cv2.cvtColor(self.roi.cropImage(img), cv2.COLOR_BGR2RGB)
+            else:
+                imgRGB = np.ascontiguousarray(self.roi.cropImage(imgRGB))
+            self.results = self.faceDetection.process(imgRGB)
+            self._mapRoi()
         # print(self.results)
         bboxs = []
         if self.results.detections:
@@ -25,14 +96,54 @@ class FaceDetector():
                 bbox = int(bboxC.xmin * iw), int(bboxC.ymin * ih), \
                        int(bboxC.width * iw), int(bboxC.height * ih)
                 bboxs.append([id, bbox, detection.score])
-                if draw:
-                    img = self.fancyDraw(img,bbox)
+        if self.tracker is not None:
+            for entry, trackId in zip(bboxs, self.tracker.update([bbox for id, bbox, score in bboxs])):
+                entry[0] = trackId
+        if draw:
+            for id, bbox, score in bboxs:
+                img = self.fancyDraw(img,bbox)
 
-                    cv2.putText(img, f'{int(detection.score[0] * 100)}%',
-                            (bbox[0], bbox[1] - 20), cv2.FONT_HERSHEY_PLAIN,
-                            2, (255, 0, 255), 2)
+                cv2.putText(img, f'{int(score[0] * 100)}%',
+                        (bbox[0], bbox[1] - 20), cv2.FONT_HERSHEY_PLAIN,
+                        2, (255, 0, 255), 2)
+        self.bboxs = bboxs
+        if self.metrics is not None:
+            self.metrics.observe("face_find_seconds", time.perf_counter() - sTime)
+            self.metrics.inc("face_frames_total")
+            self.metrics.set("face_detections", len(bboxs))
         return img, bboxs
 
+    def detect(self, img, imgRGB=None):
+        """Runs detection without drawing on img and returns a FaceResult"""
+        self.findFaces(img, False, imgRGB)
+        return self.findResult()
+
+    def findResult(self):
+        """Packs the last findFaces call into a FaceResult"""
+        boxes = np.array([bbox for id, bbox, score in self.bboxs], np.int32).reshape(-1, 4)
+        scores = np.array([score[0] for id, bbox, score in self.bboxs], np.float32)
+        return FaceResult(boxes, scores, [id for id, bbox, score in self.bboxs])
+
+    def stream(self, source, maxsize=1, dropPolicy=DROP_OLDEST):
+        """Async iterator of (frameNo, timestamp, img, FaceResult) over source, see AsyncModule.stream"""
+        return AsyncModule.stream(self.detect, source, maxsize, dropPolicy, self.metrics)
+
+    def _mapRoi(self):
+        if not self.results.detections:
+            self.roi.update(None, 0)
+            return
+        box = [1.0, 1.0, 0.0, 0.0]
+        for detection in self.results.detections:
+            bboxC = detection.location_data.relative_bounding_box
+            bboxC.xmin, bboxC.ymin = self.roi.toFrame(bboxC.xmin, bboxC.ymin)
+            bboxC.width, bboxC.height = self.roi.toFrameSize(bboxC.width, bboxC.height)
+            for keypoint in detection.location_data.relative_keypoints:
+                keypoint.x, keypoint.y = self.roi.toFrame(keypoint.x, keypoint.y)
+            box = [min(box[0], bboxC.xmin), min(box[1], bboxC.ymin),
+                   max(box[2], bboxC.xmin + bboxC.width), max(box[3], bboxC.ymin + bboxC.height)]
+        score = min(detection.score[0] for detection in self.results.detections)
+        self.roi.update(tuple(box), score)
+
     def fancyDraw(self, img, bbox, l=30, t=5, rt= 1):
         x, y, w, h = bbox
         x1, y1 = x + w, y + h
@@ -56,18 +167,25 @@ class FaceDetector():
 def main():
     cap = cv2.VideoCapture("../pose.mp4")
     pTime = 0
-    detector = FaceDetector()
-    while True:
-        success, img = cap.read()
-        img, bboxs = detector.findFaces(img)
-        print(bboxs)
+    # static stretches of the video reuse the last faces instead of running detection again
+    detector = FaceDetector(motionGate=MotionGate())
+    # without a display nothing is drawn at all
+    renderer = Renderer([DisplaySink("Image", 4)] if hasDisplay() else [])
+
+    def render(img, result):
+        nonlocal pTime
+        print(result.boxes.tolist())
 
         cTime = time.time()
-        fps = 1 / (cTime - pTime)
+        fps = 1 / max(cTime - pTime, 1e-6)
         pTime = cTime
-        cv2.putText(img, f'FPS: {int(fps)}', (20, 70), cv2.FONT_HERSHEY_PLAIN, 3, (0, 255, 0), 2)
-        cv2.imshow("Image", img)
-        cv2.waitKey(4)
+        return renderer.render(img, [result], fps)
+
+    # a video file should not lose frames, so the stages block instead of dropping
+    Pipeline(cap, detector.detect, render, maxsize=4, dropPolicy=BLOCK).run()
+    cap.release()
+    print(f'skipped {detector.motionGate.skipRatio:.0%} of frames')
+    renderer.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,117 @@
+import math
+import time
+from abc import ABC, abstractmethod
+import numpy as np
+
+
+class LandmarkFilter(ABC):
+    """Base for temporal filters over (N, L, D) landmark arrays of N tracked subjects.
+
+    Every subject keeps its own state, keyed by the id passed for it (its row number when no ids
+    are given). All subjects seen in a frame are updated together in one vectorized step, and the
+    state of any subject missing from a frame is dropped, so it starts over once it comes back.
+    """
+
+    def __init__(self):
+        self.states = {}
+
+    def reset(self, id=None):
+        if id is None:
+            self.states = {}
+        else:
+            self.states.pop(id, None)
+
+    def filter(self, landmarks, ids=None, timestamp=None):
+        """Returns the filtered landmarks as a float32 array of the same shape"""
+        x = np.asarray(landmarks, np.float32)
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        ids = list(range(len(x))) if ids is None else list(ids)
+        out = x.copy()
+        known = [i for i, id in enumerate(ids) if id in self.states]
+        rows = {}
+        if known:
+            fields = zip(*(self.states[ids[i]] for i in known))
+            t, *state = (np.stack(field) for field in fields)
+            dt = np.maximum(timestamp - t, 1e-6).astype(np.float32).reshape(-1, 1, 1)
+            state = self._step(state, x[known], dt)
+            out[known] = state[0]
+            rows = {i: k for k, i in enumerate(known)}
+        states = {}
+        for i, id in enumerate(ids):
+            if i in rows:
+                states[id] = (timestamp,) + tuple(field[rows[i]] for field in state)
+            else:
+                states[id] = (timestamp,) + self._init(x[i])
+        self.states = states
+        return out
+
+    @abstractmethod
+    def _init(self, x):
+        """State tuple of a subject first seen with landmarks x"""
+
+    @abstractmethod
+    def _step(self, state, x, dt):
+        """Next state of the stacked states of every known subject, the first field is the output"""
+
+
+def _alpha(cutoff, dt):
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroFilter(LandmarkFilter):
+    """One-Euro filter: heavy smoothing while a landmark is still, little lag once it moves.
+
+    minCutoff (Hz) sets the jitter removed at rest, beta how fast the cutoff rises with speed
+    (in landmark units per second, so pixels want a much smaller beta than normalized values).
+    """
+
+    def __init__(self, minCutoff=1.0, beta=0.0, dCutoff=1.0):
+        super().__init__()
+        self.minCutoff = minCutoff
+        self.beta = beta
+        self.dCutoff = dCutoff
+
+    def _init(self, x):
+        return x, np.zeros_like(x)
+
+    def _step(self, state, x, dt):
+        xPrev, dxPrev = state
+        aD = _alpha(self.dCutoff, dt)
+        dx = aD * (x - xPrev) / dt + (1 - aD) * dxPrev
+        speed = np.linalg.norm(dx, axis=-1, keepdims=True)
+        a = _alpha(self.minCutoff + self.beta * speed, dt)
+        return a * x + (1 - a) * xPrev, dx
+
+
+class KalmanFilter(LandmarkFilter):
+    """Constant-velocity Kalman filter run independently on every landmark coordinate.
+
+    processNoise is the white acceleration variance, measurementNoise the variance of a
+    detection, both in squared landmark units.
+    """
+
+    def __init__(self, processNoise=1e3, measurementNoise=10.0):
+        super().__init__()
+        self.processNoise = processNoise
+        self.measurementNoise = measurementNoise
+
+    def _init(self, x):
+        zeros = np.zeros_like(x)
+        return x, zeros, np.full_like(x, self.measurementNoise), zeros, np.full_like(x, self.processNoise)
+
+    def _step(self, state, x, dt):
+        p, v, p00, p01, p11 = state
+        q = self.processNoise
+        # predict
+        p = p + v * dt
+        p00 = p00 + dt * (2 * p01 + dt * p11) + q * dt ** 4 / 4
+        p01 = p01 + dt * p11 + q * dt ** 3 / 2
+        p11 = p11 + q * dt ** 2
+        # update
+        k0 = p00 / (p00 + self.measurementNoise)
+        k1 = p01 / (p00 + self.measurementNoise)
+        y = x - p
+        p11 = p11 - k1 * p01
+        p00, p01 = (1 - k0) * p00, (1 - k0) * p01
+        return p + k0 * y, v + k1 * y, p00, p01, p11
@@ -0,0 +1,72 @@
+import numpy as np
+
+
+TIP_IDS = (4, 8, 12, 16, 20)
+
+# (p1, p2, p3) pose landmark triples, the angle is measured at p2
+POSE_JOINTS = {
+    "leftElbow": (11, 13, 15),
+    "rightElbow": (12, 14, 16),
+    "leftShoulder": (13, 11, 23),
+    "rightShoulder": (14, 12, 24),
+    "leftHip": (11, 23, 25),
+    "rightHip": (12, 24, 26),
+    "leftKnee": (23, 25, 27),
+    "rightKnee": (24, 26, 28),
+}
+
+
+def _points(landmarks):
+    return np.asarray(landmarks, np.float32)[..., :2]
+
+
+def angles(landmarks, triples):
+    """Angles in degrees, in [0, 360), at p2 for every (p1, p2, p3) triple.
+
+    landmarks is any (..., L, >=2) array such as findLandmarks' (N, L, 3) or a whole recording's
+    (frames, N, L, 3); the result is (..., K) for K triples. The angle is measured the same way
+    as poseDetector.findAngle.
+    """
+    points = _points(landmarks)
+    triples = np.asarray(triples, np.intp).reshape(-1, 3)
+    p1, p2, p3 = (points[..., triples[:, i], :] for i in range(3))
+    a = p1 - p2
+    b = p3 - p2
+    angle = np.degrees(np.arctan2(b[..., 1], b[..., 0]) - np.arctan2(a[..., 1], a[..., 0]))
+    return angle % 360
+
+
+def distances(landmarks, pairs):
+    """Euclidean distance for every (p1, p2) pair, (..., L, >=2) landmarks -> (..., K)"""
+    points = _points(landmarks)
+    pairs = np.asarray(pairs, np.intp).reshape(-1, 2)
+    return np.linalg.norm(points[..., pairs[:, 0], :] - points[..., pairs[:, 1], :], axis=-1)
+
+
+def pairwiseDistances(landmarks, ids=None):
+    """Distances between every two of the landmarks in ids (all of them by default), (..., M, M)"""
+    points = _points(landmarks)
+    if ids is not None:
+        points = points[..., np.asarray(ids, np.intp), :]
+    return np.linalg.norm(points[..., :, None, :] - points[..., None, :, :], axis=-1)
+
+
+def midpoints(landmarks, pairs):
+    """Midpoint of every (p1, p2) pair, (..., L, >=2) landmarks -> (..., K, 2)"""
+    points = _points(landmarks)
+    pairs = np.asarray(pairs, np.intp).reshape(-1, 2)
+    return (points[..., pairs[:, 0], :] + points[..., pairs[:, 1], :]) / 2
+
+
+def fingersUp(landmarks):
+    """(..., 21, >=2) hand landmarks -> (..., 5) bool array, thumb first.
+
+    The thumb is up when its tip is right of the joint below it, the other fingers when their
+    tip is above the second joint below it, the same rules as handDetector.fingersUp.
+    """
+    points = _points(landmarks)
+    tips = np.asarray(TIP_IDS, np.intp)
+    up = np.empty(points.shape[:-2] + (5,), bool)
+    up[..., 0] = points[..., tips[0], 0] > points[..., tips[0] - 1, 0]
+    up[..., 1:] = points[..., tips[1:], 1] < points[..., tips[1:] - 2, 1]
+    return up
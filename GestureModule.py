@@ -0,0 +1,202 @@
+import time
+from collections import namedtuple
+import numpy as np
+
+import GeometryModule as gm
+
+
+# kind is "start" when a gesture begins and "end" when it stops, id is the hand's id
+GestureEvent = namedtuple("GestureEvent", ["name", "id", "kind", "timestamp"])
+
+DIRECTIONS = {"left": (-1, 0), "right": (1, 0), "up": (0, -1), "down": (0, 1)}
+
+# wrist to middle finger knuckle, distances and swipes are measured in multiples of it
+HAND_SIZE = (0, 9)
+
+# A gesture is a dict of conditions that all have to hold:
+#   "fingers":   5 values thumb first, 1 up, 0 down, None either, see GeometryModule.fingersUp
+#   "distances": (p1, p2, min, max) landmark distances in hand sizes, None leaves a side open
+#   "angles":    (p1, p2, p3, min, max) angles in degrees at p2, min > max wraps through 0
+#   "swipe":     (point, direction, distance, within) the point moved `distance` hand sizes
+#                towards "left", "right", "up" or "down" in the last `within` seconds
+#   "hold":      seconds the conditions must hold before the gesture starts, default debounce
+GESTURES = {
+    "open": {"fingers": (1, 1, 1, 1, 1)},
+    "fist": {"fingers": (0, 0, 0, 0, 0)},
+    "point": {"fingers": (None, 1, 0, 0, 0)},
+    "victory": {"fingers": (None, 1, 1, 0, 0)},
+    "thumbsUp": {"fingers": (1, 0, 0, 0, 0), "angles": [(2, 3, 4, 150, 210)]},
+    "pinch": {"distances": [(4, 8, None, 0.25)]},
+    "pinchHold": {"distances": [(4, 8, None, 0.25)], "hold": 0.8},
+    "swipeLeft": {"fingers": (None, 1, 1, 1, 1), "swipe": (9, "left", 1.5, 0.4), "hold": 0},
+    "swipeRight": {"fingers": (None, 1, 1, 1, 1), "swipe": (9, "right", 1.5, 0.4), "hold": 0},
+}
+
+
+def _bound(value, default):
+    return default if value is None else value
+
+
+class GestureEngine:
+    """Evaluates a table of declarative gesture rules on all tracked hands at once.
+
+    The rules are compiled up front into a handful of arrays: one finger pattern matrix, the
+    unique landmark pairs and triples every distance and angle condition needs, the swipe
+    vectors and a condition-to-gesture membership matrix. A frame then costs one fingersUp, one
+    distances and one angles call over every hand, a few comparisons and one matrix product,
+    whatever the number of gestures.
+
+    Raw matches are debounced per hand id: a gesture starts once it has held for its "hold"
+    time and ends once it has been gone for `release` seconds, each emitting one GestureEvent.
+    Hands missing from a frame end all their gestures.
+    """
+
+    def __init__(self, gestures=GESTURES, debounce=0.1, release=0.1, historySize=64):
+        if not gestures:
+            raise ValueError("no gestures to evaluate")
+        self.names = list(gestures)
+        self.release = release
+        # frames of swipe point positions kept per hand, has to cover the longest swipe
+        self.historySize = historySize
+        self.hold = np.array([_bound(gestures[name].get("hold"), debounce) for name in self.names])
+        self._compile(gestures)
+        self.states = {}
+        self.history = {}
+
+    def _compile(self, gestures):
+        members = []
+        patterns, masks = [], []
+        pairs, distances = [], []
+        triples, angles = [], []
+        points, swipes = [], []
+        for g, name in enumerate(self.names):
+            rule = gestures[name]
+            unknown = set(rule) - {"fingers", "distances", "angles", "swipe", "hold"}
+            if unknown:
+                raise ValueError(f"gesture {name!r} has unknown conditions {sorted(unknown)}")
+            count = len(members)
+            if "fingers" in rule:
+                fingers = rule["fingers"]
+                patterns.append([bool(f) for f in fingers])
+                masks.append([f is not None for f in fingers])
+                members.append(("fingers", g))
+            for p1, p2, lo, hi in rule.get("distances", ()):
+                if (p1, p2) not in pairs:
+                    pairs.append((p1, p2))
+                distances.append((pairs.index((p1, p2)), _bound(lo, -np.inf), _bound(hi, np.inf)))
+                members.append(("distances", g))
+            for p1, p2, p3, lo, hi in rule.get("angles", ()):
+                if (p1, p2, p3) not in triples:
+                    triples.append((p1, p2, p3))
+                angles.append((triples.index((p1, p2, p3)), _bound(lo, 0), _bound(hi, 360)))
+                members.append(("angles", g))
+            if "swipe" in rule:
+                point, direction, distance, within = rule["swipe"]
+                if point not in points:
+                    points.append(point)
+                swipes.append((points.index(point),) + DIRECTIONS[direction] + (distance, within))
+                members.append(("swipe", g))
+            if len(members) == count:
+                raise ValueError(f"gesture {name!r} has no conditions")
+
+        # conditions are evaluated kind by kind, members is reordered to match
+        kinds = ("fingers", "distances", "angles", "swipe")
+        members.sort(key=lambda member: kinds.index(member[0]))
+        self.membership = np.zeros((len(members), len(self.names)), np.int32)
+        for c, (kind, g) in enumerate(members):
+            self.membership[c, g] = 1
+
+        self.patterns = np.array(patterns, bool).reshape(-1, 5)
+        self.masks = np.array(masks, bool).reshape(-1, 5)
+        self.pairs = np.array(pairs + [HAND_SIZE], np.intp)
+        distances = np.array(distances, np.float64).reshape(-1, 3)
+        self.distanceIndex = distances[:, 0].astype(np.intp)
+        self.distanceLo, self.distanceHi = distances[:, 1], distances[:, 2]
+        self.triples = np.array(triples, np.intp).reshape(-1, 3)
+        angles = np.array(angles, np.float64).reshape(-1, 3)
+        self.angleIndex = angles[:, 0].astype(np.intp)
+        self.angleLo, self.angleHi = angles[:, 1], angles[:, 2]
+        self.points = np.array(points, np.intp)
+        swipes = np.array(swipes, np.float64).reshape(-1, 5)
+        self.swipeIndex = swipes[:, 0].astype(np.intp)
+        self.swipeDirections = swipes[:, 1:3]
+        self.swipeDistance = swipes[:, 3]
+        self.swipeWithin = swipes[:, 4]
+
+    def _swipes(self, points, scale, ids, timestamp):
+        """(N, S) swipe conditions from the last historySize positions of every hand's swipe points"""
+        for row, id in enumerate(ids):
+            if id not in self.history:
+                self.history[id] = [np.full(self.historySize, -np.inf),
+                                    np.zeros((self.historySize,) + points.shape[1:]), 0]
+            times, past, count = self.history[id]
+            times[count % self.historySize] = timestamp
+            past[count % self.historySize] = points[row]
+            self.history[id][2] = count + 1
+        times = np.stack([self.history[id][0] for id in ids])
+        past = np.stack([self.history[id][1] for id in ids])
+        # the oldest sample of each hand still inside each swipe's time window
+        recent = times[:, None, :] >= timestamp - self.swipeWithin[None, :, None]
+        oldest = np.where(recent, times[:, None, :], np.inf).argmin(axis=-1)
+        start = past[np.arange(len(ids))[:, None], oldest, self.swipeIndex]
+        moved = points[:, self.swipeIndex] - start
+        return (moved * self.swipeDirections).sum(axis=-1) >= self.swipeDistance * scale[:, None]
+
+    def match(self, landmarks, ids=None, timestamp=None):
+        """(N, G) bool array of the gestures each of the (N, 21, >=2) hands shows right now"""
+        landmarks = np.asarray(landmarks, np.float32)
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        ids = list(range(len(landmarks))) if ids is None else list(ids)
+        if not len(landmarks):
+            return np.zeros((0, len(self.names)), bool)
+        distances = gm.distances(landmarks, self.pairs)
+        scale = np.maximum(distances[:, -1], 1e-6)
+        conditions = []
+        if len(self.patterns):
+            up = gm.fingersUp(landmarks)
+            conditions.append(((up[:, None, :] == self.patterns) | ~self.masks).all(axis=-1))
+        if len(self.distanceIndex):
+            d = distances[:, self.distanceIndex] / scale[:, None]
+            conditions.append((d >= self.distanceLo) & (d <= self.distanceHi))
+        if len(self.angleIndex):
+            a = gm.angles(landmarks, self.triples)[:, self.angleIndex]
+            inside = (a >= self.angleLo) & (a <= self.angleHi)
+            wrapped = (a >= self.angleLo) | (a <= self.angleHi)
+            conditions.append(np.where(self.angleLo <= self.angleHi, inside, wrapped))
+        if len(self.swipeIndex):
+            conditions.append(self._swipes(landmarks[:, self.points, :2], scale, ids, timestamp))
+        failed = ~np.concatenate(conditions, axis=1)
+        return failed.astype(np.int32) @ self.membership == 0
+
+    def update(self, landmarks, ids=None, timestamp=None):
+        """Evaluates one frame of (N, 21, >=2) hands, returns the GestureEvents it caused"""
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        ids = list(range(len(landmarks))) if ids is None else list(ids)
+        matched = self.match(landmarks, ids, timestamp)
+        events = []
+        for id in set(self.states) - set(ids):
+            raw, since, active = self.states.pop(id)
+            self.history.pop(id, None)
+            events.extend(GestureEvent(self.names[g], id, "end", timestamp) for g in np.flatnonzero(active))
+        if not ids:
+            return events
+
+        new = np.zeros(len(self.names), bool)
+        raw, since, active = (np.stack(field) for field in zip(*(
+            self.states.get(id, (new, np.full(len(self.names), timestamp), new)) for id in ids)))
+        since = np.where(matched != raw, timestamp, since)
+        elapsed = timestamp - since
+        starts = matched & ~active & (elapsed >= self.hold)
+        ends = ~matched & active & (elapsed >= self.release)
+        active = (active | starts) & ~ends
+        for row, g in zip(*np.nonzero(starts)):
+            events.append(GestureEvent(self.names[g], ids[row], "start", timestamp))
+        for row, g in zip(*np.nonzero(ends)):
+            events.append(GestureEvent(self.names[g], ids[row], "end", timestamp))
+        self.states = {id: (matched[row], since[row], active[row]) for row, id in enumerate(ids)}
+        return events
+
+    def active(self, id):
+        """Names of the gestures hand id is showing, after debouncing"""
+        state = self.states.get(id)
+        return [] if state is None else [self.names[g] for g in np.flatnonzero(state[2])]
@@ -1,59 +1,183 @@
 import time
+from collections import namedtuple
 import cv2
-import mediapipe as mp
+import numpy as np
+
+import AsyncModule
+from CameraModule import CameraSource
+from PipelineModule import DROP_OLDEST, Pipeline
+from PreprocessModule import FramePreprocessor
+from QualityModule import QualityController
+from RenderModule import DisplaySink, Renderer, hasDisplay
+from TrackerModule import landmarkBoxes
+
+
+# landmarks: (N, 21, 3) float32 pixel x, y, z, ids: tracker ids, or detection order without a tracker
+HandResult = namedtuple("HandResult", ["landmarks", "ids"])
 
 
 class HandDetector:
-    def __init__(self, mode=False, maxHands=2, detectionCon=0.5, trackCon=0.5):
+    def __init__(self, mode=False, maxHands=2, detectionCon=0.5, trackCon=0.5, metrics=None, tracker=None,
+                 motionGate=None):
         self.mode = mode
         self.maxHands = maxHands
         self.detectionCon = detectionCon
         self.trackCon = trackCon
-        self.mpHands = mp.solutions.hands
-        self.hands = self.mpHands.Hands(self.mode, self.maxHands, self.detectionCon, self.trackCon)
-        self.mpDraw = mp.solutions.drawing_utils
+        # the graph is built on first use, see DetectorPool
+        self.mpHands = None
+        self.mpDraw = None
+        self._hands = None
+        # optional MetricsRegistry that records per-call timings and detection counts
+        self.metrics = metrics
+        # optional SubjectTracker, self.ids then holds a stable id for every detected hand
+        self.tracker = tracker
+        self.ids = []
+        # optional MotionGate, see MotionModule
+        self.motionGate = motionGate
+        self.results = None
+
+    @property
+    def hands(self):
+        if self._hands is None:
+            import mediapipe as mp
+            self.mpHands = mp.solutions.hands
+            self.mpDraw = mp.solutions.drawing_utils
+            self._hands = self.mpHands.Hands(self.mode, self.maxHands, self.detectionCon, self.trackCon)
+        return self._hands
+
+    @property
+    def built(self):
+        return self._hands is not None
 
-    def findHands(self, img, draw=True):
-        imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        self.results = self.hands.process(imgRGB).multi_hand_landmarks
+    def configure(self, **params):
+        """Changes constructor settings such as maxHands, the graph is rebuilt on the next frame"""
+        for name, value in params.items():
+            if name not in ("mode", "maxHands", "detectionCon", "trackCon"):
+                raise TypeError(f"{name!r} cannot be configured")
+            setattr(self, name, value)
+        if self._hands is not None:
+            self._hands.close()
+            self._hands = None
+
+    def reset(self):
+        """Forgets the frames seen so far, see DetectorPool"""
+        if self._hands is not None and not self.mode:
+            self._hands.close()
+            self._hands = None
+        for state in (self.tracker, self.motionGate):
+            if state is not None:
+                state.reset()
+        self.results = None
+        self.ids = []
+
+    def warmup(self, size=(480, 640)):
+        """Builds the graph ahead of the first frame, see DetectorPool"""
+        self.hands.process(np.zeros(tuple(size) + (3,), np.uint8))
+        return self
+
+    def findHands(self, img, draw=True, imgRGB=None):
+        # imgRGB: see FramePreprocessor
+        sTime = time.perf_counter()
+        if self.motionGate is not None and not self.motionGate.moved(img):
+            if self.metrics is not None:
+                self.metrics.inc("hand_skipped_frames_total")
+        else:
+            if imgRGB is None:
+                imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+            self.results = self.hands.process(imgRGB).multi_hand_landmarks
+        if self.tracker is not None:
+            hands = [[(lms.x, lms.y) for lms in hand.landmark] for hand in self.results or []]
+            self.ids = self.tracker.update(landmarkBoxes(hands))
         if self.results:
             for handLms in self.results:
                 if draw:
                     self.mpDraw.draw_landmarks(img, handLms, self.mpHands.HAND_CONNECTIONS)
+        if self.metrics is not None:
+            self.metrics.observe("hand_find_seconds", time.perf_counter() - sTime)
+            self.metrics.inc("hand_frames_total")
+            self.metrics.set("hand_detections", len(self.results or []))
         return img
 
+    def findLandmarks(self, img):
+        """Returns an (N, 21, 3) float32 array of x, y, z pixel coordinates for every detected hand"""
+        if not self.results:
+            return np.empty((0, 21, 3), np.float32)
+        high, width, channel = img.shape
+        landmarks = np.array([[(lms.x, lms.y, lms.z) for lms in hand.landmark] for hand in self.results],
+                             dtype=np.float32)
+        landmarks *= np.array([width, high, width], np.float32)
+        return landmarks
+
+    def findPositions(self, img, draw=False):
+        """Returns an (N, 21, 3) int32 array of [id, cx, cy] rows for every detected hand"""
+        landmarks = self.findLandmarks(img)
+        positions = np.empty(landmarks.shape, np.int32)
+        positions[..., 0] = np.arange(landmarks.shape[1])
+        positions[..., 1:] = landmarks[..., :2]
+        if draw:
+            for idx, cx, cy in positions.reshape(-1, 3):
+                cv2.circle(img, (int(cx), int(cy)), 15, (255,0,0), cv2.FILLED)
+        return positions
+
     def findposition(self, img, handNo=0, draw=True):
         lmlist = []
         if self.results:
-            myhand = self.results[handNo]
-            for idx, lms in enumerate(myhand.landmark):
-                high, width, channel = img.shape
-                cx, cy = int(lms.x * width), int(lms.y * high)
-                lmlist.append([idx, cx, cy])
-                if draw:
+            myhand = self.findPositions(img)[handNo]
+            lmlist = myhand.tolist()
+            if draw:
+                for idx, cx, cy in lmlist:
                     cv2.circle(img, (cx, cy), 15, (255,0,0), cv2.FILLED)
         return lmlist
 
+    def detect(self, img, imgRGB=None):
+        """Runs detection without drawing on img and returns a HandResult"""
+        self.findHands(img, False, imgRGB)
+        return self.findResult(img)
+
+    def findResult(self, img):
+        """Packs the last findHands call into a HandResult"""
+        landmarks = self.findLandmarks(img)
+        ids = list(self.ids) if self.tracker is not None else list(range(len(landmarks)))
+        return HandResult(landmarks, ids)
+
+    def stream(self, source, maxsize=1, dropPolicy=DROP_OLDEST):
+        """Async iterator of (frameNo, timestamp, img, HandResult) over source, see AsyncModule.stream"""
+        return AsyncModule.stream(self.detect, source, maxsize, dropPolicy, self.metrics)
+
+    def findTrack(self, img, trackId, draw=True):
+        """Like findposition, but picks the hand by its tracker id instead of the detection order"""
+        if trackId not in self.ids:
+            return []
+        return self.findposition(img, self.ids.index(trackId), draw)
+
 
 def main():
-    cap = cv2.VideoCapture(0)
+    cap = CameraSource(0).start()
     currentTime = 0
     pastTime = 0
     detector = HandDetector()
-    while True:
-        success, img = cap.read()
-        img = detector.findHands(img)
-        lmlist = detector.findposition(img, 0, True)
-        if len(lmlist)!=0:
-            print(lmlist[4])
+    preprocessor = FramePreprocessor()
+    # steps resolution, frame skipping and maxHands to hold 30 fps on whatever machine this runs on
+    controller = QualityController(targetFps=30)
+    detect = controller.wrap(lambda img: detector.detect(img, preprocessor.process(img)), preprocessor, detector)
+    # without a display nothing is drawn at all
+    renderer = Renderer([DisplaySink("Hands")] if hasDisplay() else [])
+
+    def render(img, result):
+        nonlocal currentTime, pastTime
+        if len(result.landmarks)!=0:
+            print(result.landmarks[0, 4])
 
         currentTime = time.time()
-        fps = (1 / (currentTime - pastTime))
+        fps = 1 / max(currentTime - pastTime, 1e-6)
         pastTime = currentTime
 
-        cv2.putText(img, str(int(fps)), (60, 100), cv2.FONT_HERSHEY_PLAIN, 5, (255, 0, 0))
-        cv2.imshow("Hands", img)
-        cv2.waitKey(1)
+        return renderer.render(img, [result], fps)
+
+    # capture, detection and drawing run on separate threads, stale frames are dropped
+    Pipeline(cap, detect, render).run()
+    cap.release()
+    renderer.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,171 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+
+class Histogram:
+    """Keeps the last `size` sampled observations in a ring buffer, count and sum cover every observation"""
+
+    def __init__(self, size=1024):
+        self.values = np.zeros(size, np.float64)
+        self.count = 0
+        self.sum = 0.0
+        self.sampled = 0
+
+    def observe(self, value, sample=True):
+        """Adds value to count and sum, and to the percentile window when sample is set"""
+        self.count += 1
+        self.sum += value
+        if sample:
+            self.values[self.sampled % len(self.values)] = value
+            self.sampled += 1
+
+    def percentiles(self, qs=(50, 95, 99)):
+        window = self.values[:min(self.sampled, len(self.values))]
+        if not len(window):
+            return [0.0 for q in qs]
+        return [float(v) for v in np.percentile(window, qs)]
+
+
+def _series(name, labels):
+    """Registry key of a metric name and its labels, a dict of label name to value"""
+    return name, tuple(sorted((key, str(value)) for key, value in (labels or {}).items()))
+
+
+def _labelText(labels):
+    """{name="value",...} selector of label pairs, values escaped as the exposition format wants"""
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class _Timer:
+    def __init__(self, registry, name, labels=None):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.sTime = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.sTime, self.labels)
+
+
+class MetricsRegistry:
+    """In-process registry of counters, gauges and ring-buffer histograms.
+
+    Counters and gauges are always exact, and so are the count and sum of every histogram.
+    Only every `sampleEvery`-th observation of a name goes into its percentile window, which
+    keeps the cost of leaving timing on in production down to two additions for the others.
+
+    Every metric can carry labels, e.g. labels={"stream": "rtsp://cam/1"}: one name then holds
+    a series per label set, so free-form values such as source URLs never end up in metric names.
+    """
+
+    def __init__(self, sampleEvery=1, histogramSize=1024):
+        self.sampleEvery = max(1, sampleEvery)
+        self.histogramSize = histogramSize
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, labels=None):
+        series = _series(name, labels)
+        with self._lock:
+            self.counters[series] = self.counters.get(series, 0) + value
+
+    def set(self, name, value, labels=None):
+        self.gauges[_series(name, labels)] = value
+
+    def observe(self, name, value, labels=None):
+        series = _series(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(series)
+            if histogram is None:
+                histogram = self.histograms[series] = Histogram(self.histogramSize)
+            histogram.observe(value, histogram.count % self.sampleEvery == 0)
+
+    def timer(self, name, labels=None):
+        """Context manager that observes the seconds spent inside it under `name`"""
+        return _Timer(self, name, labels)
+
+    def _summaries(self):
+        """(series, summary dict) of every histogram, sorted by series"""
+        with self._lock:
+            summaries = []
+            for series, histogram in sorted(self.histograms.items()):
+                p50, p95, p99 = histogram.percentiles()
+                summaries.append((series, {"count": histogram.count, "sum": histogram.sum,
+                                           "p50": p50, "p95": p95, "p99": p99}))
+            return summaries
+
+    def snapshot(self):
+        """Plain dicts of every metric, keyed by name and label selector, e.g. 'frames{stream="0"}'"""
+        with self._lock:
+            counters = {name + _labelText(labels): value for (name, labels), value in self.counters.items()}
+            gauges = {name + _labelText(labels): value for (name, labels), value in list(self.gauges.items())}
+        histograms = {name + _labelText(labels): summary for (name, labels), summary in self._summaries()}
+        return {"counters": counters, "gauges": gauges, "histograms": histograms}
+
+    def toPrometheus(self):
+        """Renders the registry in the Prometheus text exposition format"""
+        with self._lock:
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items())
+        lines = []
+        typed = set()
+        for kind, items in (("counter", counters), ("gauge", gauges)):
+            for (name, labels), value in items:
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name}{_labelText(labels)} {value}")
+        for (name, labels), summary in self._summaries():
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} summary")
+            for quantile, key in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99")):
+                lines.append(f'{name}{_labelText(labels + (("quantile", quantile),))} {summary[key]}')
+            lines += [f"{name}_sum{_labelText(labels)} {summary['sum']}",
+                      f"{name}_count{_labelText(labels)} {summary['count']}"]
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """Writes a JSON snapshot for *.json paths, Prometheus text otherwise"""
+        with open(path, "w") as f:
+            if path.endswith(".json"):
+                json.dump(self.snapshot(), f, indent=2)
+            else:
+                f.write(self.toPrometheus())
+
+    def serve(self, port=9100, host="127.0.0.1"):
+        """Serves the Prometheus text on http://host:port/metrics from a daemon thread"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.toPrometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
@@ -0,0 +1,78 @@
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Tells whether a frame changed enough since the last one detection ran on.
+
+    Frames are shrunk to a `width` pixels wide grayscale copy and compared against the copy of
+    the last frame that was let through: when at least `threshold` of the pixels differ by more
+    than `pixelThreshold` grey levels the frame counts as moved. Comparing against the last
+    frame let through rather than the previous one means slow changes still add up to a trigger.
+    Every `maxSkip`-th frame is let through regardless, so a detector still notices a subject
+    that walked in too slowly to trip the threshold.
+
+    The detectors take one as their motionGate argument: frames it lets through run the graph,
+    on the others the detector keeps and returns its last results.
+    """
+
+    def __init__(self, threshold=0.01, pixelThreshold=25, width=64, maxSkip=30):
+        self.threshold = threshold
+        self.pixelThreshold = pixelThreshold
+        self.width = width
+        self.maxSkip = maxSkip
+        self.frames = 0
+        self.skipped = 0
+        self._sinceRun = 0
+        self._small = None
+        self._gray = None
+        self._reference = None
+        self._diff = None
+
+    def __repr__(self):
+        # stable across runs, CacheModule uses it in cache keys
+        return (f"MotionGate(threshold={self.threshold}, pixelThreshold={self.pixelThreshold}, "
+                f"width={self.width}, maxSkip={self.maxSkip})")
+
+    @property
+    def skipRatio(self):
+        """Share of the frames seen so far that did not need detection"""
+        return self.skipped / self.frames if self.frames else 0.0
+
+    def reset(self):
+        """Forgets the reference frame, the next frame is let through"""
+        self._reference = None
+        self._sinceRun = 0
+
+    def _downsample(self, img):
+        h, w = img.shape[:2]
+        size = (self.width, max(1, round(h * self.width / w)))
+        if self._small is None or self._small.shape != size[::-1] + img.shape[2:]:
+            self._small = np.empty(size[::-1] + img.shape[2:], np.uint8)
+            self._gray = np.empty(size[::-1], np.uint8)
+            self._diff = np.empty(size[::-1], np.uint8)
+            self._reference = None
+        cv2.resize(img, size, dst=self._small, interpolation=cv2.INTER_AREA)
+        if img.ndim == 3:
+            cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        else:
+            self._gray[...] = self._small
+        return self._gray
+
+    def moved(self, img):
+        """True when detection has to run on img, False when the last results still hold"""
+        self.frames += 1
+        gray = self._downsample(img)
+        if self._reference is not None and self._sinceRun < self.maxSkip - 1:
+            cv2.absdiff(gray, self._reference, dst=self._diff)
+            cv2.threshold(self._diff, self.pixelThreshold, 255, cv2.THRESH_BINARY, dst=self._diff)
+            if cv2.countNonZero(self._diff) < self.threshold * self._diff.size:
+                self.skipped += 1
+                self._sinceRun += 1
+                return False
+        # the frame let through becomes the reference, its buffer is swapped rather than copied
+        if self._reference is None:
+            self._reference = np.empty_like(gray)
+        self._reference, self._gray = gray, self._reference
+        self._sinceRun = 0
+        return True
@@ -0,0 +1,201 @@
+import argparse
+import os
+import threading
+import time
+
+from BatchModule import MODELS, detectorPool
+from CameraModule import CameraSource
+
+
+class Stream:
+    """One camera of a StreamOrchestrator and its scheduling state"""
+
+    def __init__(self, name, source, callback=None, maxFps=None):
+        self.name = name
+        self.source = source
+        self.callback = callback
+        self.minInterval = 1 / maxFps if maxFps else 0.0
+        self.lastFrameNo = -1
+        self.lastServed = 0.0
+        self.busy = False
+        self.processed = 0
+        self.dropped = 0
+        # frames whose detection or callback raised
+        self.errors = 0
+
+    def ready(self, now):
+        """True when a frame newer than the last processed one waits and the FPS cap allows it"""
+        return (not self.busy and self.source.frameNo > self.lastFrameNo
+                and now - self.lastServed >= self.minInterval)
+
+    @property
+    def finished(self):
+        return not self.source.running and self.source.frameNo <= self.lastFrameNo
+
+
+class StreamOrchestrator:
+    """Runs many cameras through a few shared detectors.
+
+    Every source gets a CameraSource, i.e. its own capture thread keeping only the newest frame.
+    `workers` detection threads each borrow one detector from detectorPool, so the process holds
+    `workers` MediaPipe graphs however many cameras there are. A free worker takes the newest
+    frame of the ready stream that was served longest ago, a stream is ready when it has a frame
+    it has not processed yet, none in flight, and its FPS cap allows another one. Frames a stream
+    captured while it waited are skipped and counted in stream.dropped.
+
+    Since one detector sees frames of every stream, hand and pose detectors run in static image
+    mode by default: their tracking between frames would otherwise mix up cameras. The result of
+    every frame goes to the stream's callback(stream, frameNo, timestamp, img, result), called on
+    the worker thread, so it has to be quick or hand the work off. A frame whose detection or
+    callback raises is counted in stream.errors and the worker moves on; the first such exception
+    is kept in `error`.
+    """
+
+    def __init__(self, model="hand", workers=2, params=None, metrics=None, poll=0.005):
+        self.model = model
+        self.workers = workers
+        self.params = dict(params or {})
+        if model in ("hand", "pose"):
+            self.params.setdefault("mode", True)
+        # optional MetricsRegistry that records per-stream processed and dropped frames
+        self.metrics = metrics
+        self.poll = poll
+        # first exception a detection or callback raised, the frame is counted in stream.errors
+        self.error = None
+        self.streams = []
+        self._running = False
+        self._threads = []
+        self._cond = threading.Condition()
+
+    def add(self, source, callback=None, maxFps=None, name=None):
+        """Adds a camera index, video path or URL, or an already created CameraSource"""
+        if not isinstance(source, CameraSource):
+            # a video file ends, anything else is reopened when it fails
+            source = CameraSource(source, reconnect=not (isinstance(source, str) and os.path.isfile(source)))
+        stream = Stream(name if name is not None else str(len(self.streams)), source, callback, maxFps)
+        with self._cond:
+            self.streams.append(stream)
+        if self._running:
+            source.start()
+        return stream
+
+    def _next(self):
+        """Picks the ready stream served longest ago and marks it busy, None when nothing is ready"""
+        now = time.monotonic()
+        ready = [stream for stream in self.streams if stream.ready(now)]
+        if not ready:
+            return None
+        stream = min(ready, key=lambda stream: stream.lastServed)
+        stream.busy = True
+        stream.lastServed = now
+        return stream
+
+    def _work(self):
+        detector = detectorPool.acquire(self.model, **self.params)
+        try:
+            while True:
+                with self._cond:
+                    stream = self._next()
+                    while stream is None and self._running:
+                        self._cond.wait(self.poll)
+                        stream = self._next()
+                    if stream is None:
+                        break
+                frameNo, timestamp, img = stream.source.readLatest()
+                failed = None
+                try:
+                    result = detector.detect(img)
+                    if stream.callback is not None:
+                        stream.callback(stream, frameNo, timestamp, img, result)
+                except Exception as error:
+                    # one bad frame or callback must not take the worker down with it
+                    failed = error
+                with self._cond:
+                    stream.dropped += max(frameNo - stream.lastFrameNo - 1, 0)
+                    stream.lastFrameNo = frameNo
+                    stream.processed += 1
+                    stream.busy = False
+                    if failed is not None:
+                        stream.errors += 1
+                        if self.error is None:
+                            self.error = failed
+                    # the stream may be ready again for a worker that is waiting
+                    self._cond.notify()
+                if self.metrics is not None:
+                    labels = {"stream": stream.name}
+                    self.metrics.inc("stream_processed_frames_total", labels=labels)
+                    self.metrics.set("stream_dropped_frames", stream.dropped, labels)
+                    if failed is not None:
+                        self.metrics.inc("stream_errors_total", labels=labels)
+        finally:
+            detectorPool.release(detector)
+
+    def start(self):
+        if self._running:
+            return self
+        self._running = True
+        for stream in self.streams:
+            stream.source.start()
+        self._threads = [threading.Thread(target=self._work, daemon=True) for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    @property
+    def finished(self):
+        """True once every source has ended and its last frame was processed"""
+        with self._cond:
+            return all(stream.finished for stream in self.streams)
+
+    def stop(self):
+        """Stops the workers, then the capture threads, and waits for all of them"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        for stream in self.streams:
+            stream.source.release()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many cameras through a shared pool of detectors")
+    parser.add_argument("sources", nargs="+", help="camera indexes, video paths or stream URLs")
+    parser.add_argument("--model", choices=MODELS, default="hand")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-fps", type=float, default=None, help="per-stream cap")
+    args = parser.parse_args()
+
+    counts = {}
+
+    def count(stream, frameNo, timestamp, img, result):
+        counts[stream.name] = counts.get(stream.name, 0) + 1
+
+    orchestrator = StreamOrchestrator(args.model, args.workers)
+    for source in args.sources:
+        orchestrator.add(int(source) if source.isdigit() else source, count, args.max_fps, source)
+    pTime = time.time()
+    with orchestrator:
+        try:
+            while not orchestrator.finished:
+                time.sleep(1)
+                cTime = time.time()
+                print("  ".join(f'{name}: {n / (cTime - pTime):.1f} fps' for name, n in counts.items()))
+                counts.clear()
+                pTime = cTime
+        except KeyboardInterrupt:
+            pass
+    if orchestrator.error is not None:
+        failed = sum(stream.errors for stream in orchestrator.streams)
+        print(f'{failed} frames failed, the first with {orchestrator.error!r}')
+
+
+if __name__ == "__main__":
+    main()
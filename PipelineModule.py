@@ -0,0 +1,202 @@
+import queue
+import threading
+import time
+import numpy as np
+
+
+DROP_OLDEST = "latest"
+BLOCK = "block"
+
+
+def putFrame(q, item, dropPolicy=DROP_OLDEST):
+    """Puts item on a bounded queue, returns the number of stale items dropped to make room"""
+    if dropPolicy == BLOCK:
+        q.put(item)
+        return 0
+    dropped = 0
+    while True:
+        try:
+            q.put_nowait(item)
+            return dropped
+        except queue.Full:
+            try:
+                q.get_nowait()
+                dropped += 1
+            except queue.Empty:
+                pass
+
+
+class FrameSlot:
+    """Latest-frame-wins hand-off from one producer thread to one consumer thread.
+
+    Frames live in a small pool of preallocated buffers. The producer fills the buffer from
+    acquire() and publishes it, the consumer takes the newest published one; a frame the consumer
+    never got to is simply overwritten later. Three buffers are enough for the producer never to
+    touch the one being read or the one waiting to be read.
+    """
+
+    def __init__(self, buffers=3):
+        self.buffers = buffers
+        self.dropped = 0
+        self._pool = []
+        self._latest = None
+        self._reading = None
+        self._pending = False
+        self._lock = threading.Lock()
+
+    def acquire(self, shape, dtype=np.uint8):
+        """Returns a buffer neither published nor being read, for the producer to fill"""
+        with self._lock:
+            if self._pool and (self._pool[0].shape != shape or self._pool[0].dtype != dtype):
+                self._pool = []
+            for buf in self._pool:
+                if buf is not self._latest and buf is not self._reading:
+                    return buf
+            buf = np.empty(shape, dtype)
+            if len(self._pool) < self.buffers:
+                self._pool.append(buf)
+            return buf
+
+    def publish(self, buf):
+        """Makes buf the newest frame, returns True when the consumer has to be notified"""
+        with self._lock:
+            if self._latest is not None:
+                self.dropped += 1
+            self._latest = buf
+            notify = not self._pending
+            self._pending = True
+            return notify
+
+    def take(self):
+        """Returns the newest frame or None, the buffer stays valid until the next take()"""
+        with self._lock:
+            buf = self._latest
+            self._latest = None
+            self._pending = False
+            if buf is not None:
+                self._reading = buf
+            return buf
+
+
+class Pipeline:
+    """Capture -> detect -> render stages linked by bounded queues.
+
+    Capture and detection each run on their own thread, rendering runs on the thread that
+    calls run() since cv2.imshow has to stay on the main thread on most platforms.
+    With dropPolicy="latest" a full queue discards its oldest frame so latency stays
+    bounded when the detector falls behind, with dropPolicy="block" every frame is kept
+    which is what offline video files want. An optional MetricsRegistry gets per-stage
+    timings, drop counts and queue depths.
+    """
+
+    def __init__(self, source, detect, render=None, maxsize=1, dropPolicy=DROP_OLDEST, metrics=None):
+        self.source = source
+        self.detect = detect
+        self.render = render
+        self.dropPolicy = dropPolicy
+        self.captureQueue = queue.Queue(maxsize)
+        self.renderQueue = queue.Queue(maxsize)
+        self.captured = 0
+        self.dropped = 0
+        self.metrics = metrics
+        # first exception a stage raised, the pipeline ends and results() re-raises it
+        self.error = None
+        self._stop = threading.Event()
+        self._threads = []
+
+    def _capture(self):
+        try:
+            while not self._stop.is_set():
+                sTime = time.perf_counter()
+                success, img = self.source.read()
+                if not success:
+                    break
+                dropped = putFrame(self.captureQueue, (self.captured, time.time(), img), self.dropPolicy)
+                self.dropped += dropped
+                self.captured += 1
+                if self.metrics is not None:
+                    self.metrics.observe("pipeline_capture_seconds", time.perf_counter() - sTime)
+                    self.metrics.inc("pipeline_captured_frames_total")
+                    self.metrics.inc("pipeline_dropped_frames_total", dropped)
+                    self.metrics.set("pipeline_capture_queue_depth", self.captureQueue.qsize())
+        except Exception as error:
+            # frames already queued still get detected, the end of stream marker follows them
+            self._fail(error)
+        finally:
+            putFrame(self.captureQueue, None, BLOCK)
+
+    def _detect(self):
+        try:
+            while True:
+                item = self.captureQueue.get()
+                if item is None or self._stop.is_set():
+                    break
+                frameNo, timestamp, img = item
+                sTime = time.perf_counter()
+                result = self.detect(img)
+                dTime = time.perf_counter()
+                dropped = putFrame(self.renderQueue, (frameNo, timestamp, img, result), self.dropPolicy)
+                self.dropped += dropped
+                if self.metrics is not None:
+                    self.metrics.observe("pipeline_detect_seconds", dTime - sTime)
+                    self.metrics.inc("pipeline_dropped_frames_total", dropped)
+                    self.metrics.set("pipeline_render_queue_depth", self.renderQueue.qsize())
+        except Exception as error:
+            self._fail(error)
+            # nothing reads the capture queue any more
+            self._stop.set()
+        finally:
+            putFrame(self.renderQueue, None, BLOCK)
+
+    def _fail(self, error):
+        """Keeps the first error a stage raised for results() to raise"""
+        if self.error is None:
+            self.error = error
+
+    def start(self):
+        self.error = None
+        self._stop.clear()
+        self._threads = [threading.Thread(target=self._capture, daemon=True),
+                         threading.Thread(target=self._detect, daemon=True)]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        """Stops the capture and detect threads and waits for them to finish"""
+        self._stop.set()
+        for thread in self._threads:
+            while thread.is_alive():
+                # keep draining so a stage blocked on a full queue can see the stop flag
+                for q in (self.captureQueue, self.renderQueue):
+                    try:
+                        q.get_nowait()
+                    except queue.Empty:
+                        pass
+                thread.join(0.05)
+        self._threads = []
+
+    def results(self):
+        """Yields (frameNo, timestamp, img, result) in order until the source runs out.
+
+        An exception raised by the source or by detect ends the stream and is raised here.
+        """
+        if not self._threads:
+            self.start()
+        try:
+            while True:
+                item = self.renderQueue.get()
+                if item is None:
+                    break
+                yield item
+            if self.error is not None:
+                raise self.error
+        finally:
+            self.stop()
+
+    def run(self):
+        """Renders every result on the calling thread, stops when render returns False"""
+        for frameNo, timestamp, img, result in self.results():
+            if self.render is not None and self.render(img, result) is False:
+                break
+
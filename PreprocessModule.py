@@ -0,0 +1,64 @@
+import cv2
+import numpy as np
+
+
+class FramePreprocessor:
+    """Resizes a BGR frame and converts it to RGB into buffers that are reused every frame.
+
+    The output fits inside width x height with the aspect ratio kept, and is only made larger
+    than the input when upscale is set. MediaPipe reports normalized coordinates, so detectors
+    fed this output still report positions in original-frame pixels as long as they scale by
+    the original frame's shape. Pass the output as imgRGB to a detector's findFaces, findHands,
+    findPose or detect, alongside the original frame, and the detector skips its own conversion,
+    so several detectors can share one resize and conversion per frame.
+
+    The returned array is overwritten by the next call, copy it if it has to outlive the frame.
+    """
+
+    def __init__(self, width=640, height=None, upscale=False):
+        self.width = width
+        self.height = height
+        self.upscale = upscale
+        self.scale = 1.0
+        self._inShape = None
+        self._small = None
+        self._rgb = None
+
+    def configure(self, width=None, height=None):
+        """Changes the output size, the buffers are reallocated on the next frame"""
+        if width is not None:
+            self.width = width
+        if height is not None:
+            self.height = height
+        self._inShape = None
+
+    def outputSize(self, shape):
+        h, w = shape[:2]
+        scale = self.width / w
+        if self.height is not None:
+            scale = min(scale, self.height / h)
+        if not self.upscale:
+            scale = min(scale, 1.0)
+        return max(1, int(round(w * scale))), max(1, int(round(h * scale))), scale
+
+    def _allocate(self, shape):
+        w, h, self.scale = self.outputSize(shape)
+        self._inShape = shape
+        self._small = np.empty((h, w, 3), np.uint8) if (w, h) != (shape[1], shape[0]) else None
+        self._rgb = np.empty((h, w, 3), np.uint8)
+
+    def process(self, img, out=None):
+        """Returns the resized RGB frame, written into `out` instead of the internal buffer if given"""
+        if img.shape != self._inShape:
+            self._allocate(img.shape)
+        src = img
+        if self._small is not None:
+            h, w = self._small.shape[:2]
+            interpolation = cv2.INTER_AREA if self.scale < 1 else cv2.INTER_LINEAR
+            # resize first so the color conversion only touches the smaller frame
+            cv2.resize(img, (w, h), dst=self._small, interpolation=interpolation)
+            src = self._small
+        if out is None:
+            out = self._rgb
+        cv2.cvtColor(src, cv2.COLOR_BGR2RGB, dst=out)
+        return out
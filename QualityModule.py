@@ -0,0 +1,106 @@
+import time
+from collections import deque
+import numpy as np
+
+
+# best first; each step gives up a bit of quality for speed
+DEFAULT_LEVELS = (
+    {"width": 1280, "skip": 1, "maxHands": 2, "upBody": False},
+    {"width": 960, "skip": 1, "maxHands": 2, "upBody": False},
+    {"width": 640, "skip": 1, "maxHands": 2, "upBody": False},
+    {"width": 480, "skip": 1, "maxHands": 1, "upBody": True},
+    {"width": 480, "skip": 2, "maxHands": 1, "upBody": True},
+    {"width": 320, "skip": 3, "maxHands": 1, "upBody": True},
+)
+
+
+class QualityController:
+    """Steps inference quality up and down so detection keeps up with a frame-time budget.
+
+    The budget is 1 / targetFps or an explicit `budget` in seconds. Every `window` processed
+    frames the median detection time, divided by the skip interval since only every skip-th frame
+    is run, is compared against it: above the budget the controller moves one level down the
+    `levels` ladder, below `headroom` times the budget it moves one level up again. After a change
+    a whole new window is measured first, and a level that was measured over budget in the last
+    `memory` seconds is not tried again, so the controller does not flap between two levels.
+
+    A level is a dict of settings. "skip" is handled here, every other key is passed to the
+    configure() method of each target that has an attribute of that name, e.g. "width" to a
+    FramePreprocessor and "maxHands" to a HandDetector.
+    """
+
+    def __init__(self, targetFps=30, budget=None, levels=DEFAULT_LEVELS, level=0, window=30, headroom=0.6,
+                 memory=30.0, metrics=None):
+        self.budget = budget if budget is not None else 1 / targetFps
+        self.levels = list(levels)
+        self.level = min(level, len(self.levels) - 1)
+        self.window = window
+        self.headroom = headroom
+        self.memory = memory
+        # optional MetricsRegistry that records the current level and frame cost
+        self.metrics = metrics
+        self.costs = {}
+        self._samples = deque(maxlen=window)
+
+    @property
+    def settings(self):
+        return self.levels[self.level]
+
+    @property
+    def skip(self):
+        return self.settings.get("skip", 1)
+
+    def observe(self, seconds):
+        """Records the detection time of one processed frame, returns True when the level changed"""
+        self._samples.append(seconds)
+        if len(self._samples) < self.window:
+            return False
+        cost = float(np.median(self._samples)) / self.skip
+        now = time.monotonic()
+        self.costs[self.level] = (cost, now)
+        if self.metrics is not None:
+            self.metrics.set("quality_level", self.level)
+            self.metrics.set("quality_frame_cost_seconds", cost)
+        level = self.level
+        if cost > self.budget:
+            level = min(level + 1, len(self.levels) - 1)
+        elif cost < self.budget * self.headroom and level > 0:
+            known, measured = self.costs.get(level - 1, (0.0, 0.0))
+            if known <= self.budget or now - measured > self.memory:
+                level -= 1
+        self._samples.clear()
+        if level == self.level:
+            return False
+        self.level = level
+        if self.metrics is not None:
+            self.metrics.inc("quality_level_changes_total")
+        return True
+
+    def apply(self, *targets):
+        """Passes the settings of the current level on to every target that has them"""
+        for target in targets:
+            changed = {name: value for name, value in self.settings.items()
+                       if name != "skip" and hasattr(target, name) and getattr(target, name) != value}
+            if changed:
+                target.configure(**changed)
+
+    def wrap(self, detect, *targets):
+        """Turns detect(img) into one that skips frames, reusing the last result, and retunes targets.
+
+        The returned function suits Pipeline's detect stage.
+        """
+        self.apply(*targets)
+        state = {"frameNo": 0, "result": None}
+
+        def adaptiveDetect(img):
+            frameNo = state["frameNo"]
+            state["frameNo"] += 1
+            if frameNo % self.skip and state["result"] is not None:
+                return state["result"]
+            sTime = time.perf_counter()
+            state["result"] = detect(img)
+            if self.observe(time.perf_counter() - sTime):
+                self.apply(*targets)
+            return state["result"]
+
+        return adaptiveDetect
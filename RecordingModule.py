@@ -0,0 +1,154 @@
+import os
+import struct
+import time
+import cv2
+import numpy as np
+
+
+MAGIC = b"LMREC\x00\x00\x01"
+VERSION = 1
+# magic, version, points per subject, dims per point, max subjects per frame, creation time
+HEADER = struct.Struct("<8sHHHHd")
+HEADER_SIZE = 64
+
+
+def recordDtype(points, dims, maxSubjects):
+    """Fixed-size per-frame record, so frame i always starts at HEADER_SIZE + i * itemsize"""
+    return np.dtype([
+        ("timestamp", "<f8"),
+        ("frameNo", "<u4"),
+        ("count", "<u4"),
+        ("scores", "<f4", (maxSubjects,)),
+        ("landmarks", "<f4", (maxSubjects, points, dims)),
+    ])
+
+
+def readHeader(f):
+    magic, version, points, dims, maxSubjects, created = HEADER.unpack(f.read(HEADER_SIZE)[:HEADER.size])
+    if magic != MAGIC:
+        raise ValueError("not a landmark recording")
+    if version != VERSION:
+        raise ValueError(f"unsupported recording version {version}")
+    return points, dims, maxSubjects, created
+
+
+class RecordingWriter:
+    """Append-only writer of landmark recordings, cheap enough to call from the capture loop.
+
+    Every frame becomes one fixed-size record of its timestamp, subject count, scores and
+    (maxSubjects, points, dims) float32 landmarks; subjects past maxSubjects are dropped. Opening
+    an existing file appends to it, so a recording can span restarts of the capture process.
+    """
+
+    def __init__(self, path, points=21, dims=3, maxSubjects=2):
+        exists = os.path.exists(path) and os.path.getsize(path) >= HEADER_SIZE
+        if exists:
+            with open(path, "rb") as f:
+                header = readHeader(f)[:3]
+            if header != (points, dims, maxSubjects):
+                raise ValueError(f"{path} holds {header} (points, dims, maxSubjects) records")
+        self.dtype = recordDtype(points, dims, maxSubjects)
+        self.f = open(path, "ab")
+        if exists:
+            # drop a record left half-written by a crash so the file stays aligned
+            size = self.f.seek(0, os.SEEK_END)
+            self.f.truncate(size - (size - HEADER_SIZE) % self.dtype.itemsize)
+            self.frameNo = (self.f.tell() - HEADER_SIZE) // self.dtype.itemsize
+        else:
+            self.f.truncate(0)
+            self.f.write(HEADER.pack(MAGIC, VERSION, points, dims, maxSubjects, time.time()).ljust(HEADER_SIZE, b"\0"))
+            # a reader may open the recording before the first frame is flushed
+            self.f.flush()
+            self.frameNo = 0
+        self._record = np.zeros(1, self.dtype)
+
+    def write(self, landmarks, scores=None, timestamp=None):
+        """Appends one frame of (N, points, dims) landmarks, scores are NaN when not given"""
+        record = self._record[0]
+        landmarks = np.asarray(landmarks, np.float32)
+        count = min(len(landmarks), record["landmarks"].shape[0])
+        record["timestamp"] = time.time() if timestamp is None else timestamp
+        record["frameNo"] = self.frameNo
+        record["count"] = count
+        record["scores"] = np.nan
+        record["landmarks"] = 0
+        if count:
+            record["landmarks"][:count] = landmarks[:count]
+            if scores is not None:
+                record["scores"][:count] = np.asarray(scores, np.float32)[:count]
+        self.f.write(self._record.tobytes())
+        self.frameNo += 1
+
+    def flush(self):
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RecordingReader:
+    """Random access to a landmark recording through numpy.memmap, nothing is read up front.
+
+    Records appended after the reader was opened are picked up by calling refresh().
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.points, self.dims, self.maxSubjects, self.created = readHeader(f)
+        self.dtype = recordDtype(self.points, self.dims, self.maxSubjects)
+        self.refresh()
+
+    def refresh(self):
+        count = (os.path.getsize(self.path) - HEADER_SIZE) // self.dtype.itemsize
+        if count > 0:
+            self.records = np.memmap(self.path, self.dtype, "r", HEADER_SIZE, (count,))
+        else:
+            self.records = np.zeros(0, self.dtype)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, frameNo):
+        """(timestamp, (count, points, dims) landmarks, (count,) scores) of one frame"""
+        record = self.records[frameNo]
+        count = record["count"]
+        return float(record["timestamp"]), record["landmarks"][:count], record["scores"][:count]
+
+    @property
+    def timestamps(self):
+        return self.records["timestamp"]
+
+    def timeRange(self, start, end):
+        """Records with start <= timestamp < end, as a structured memmap slice"""
+        first, last = np.searchsorted(self.timestamps, [start, end])
+        return self.records[first:last]
+
+
+def main():
+    from CameraModule import CameraSource
+    from HandTrackingModules import HandDetector
+
+    cap = CameraSource(0).start()
+    detector = HandDetector()
+    with RecordingWriter("hands.lmrec") as writer:
+        while True:
+            success, img = cap.read()
+            if not success:
+                break
+            img = detector.findHands(img)
+            writer.write(detector.findLandmarks(img))
+            cv2.imshow("Recording", img)
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+    cap.release()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import os
+import sys
+import cv2
+import numpy as np
+
+
+HAND_CONNECTIONS = np.array([
+    (0, 1), (1, 2), (2, 3), (3, 4), (0, 5), (5, 6), (6, 7), (7, 8), (5, 9), (9, 10), (10, 11),
+    (11, 12), (9, 13), (13, 14), (14, 15), (15, 16), (13, 17), (17, 18), (18, 19), (19, 20), (0, 17),
+], np.intp)
+HAND_POINTS = 21
+
+POSE_CONNECTIONS = np.array([
+    (0, 1), (1, 2), (2, 3), (3, 7), (0, 4), (4, 5), (5, 6), (6, 8), (9, 10), (11, 12), (11, 13),
+    (13, 15), (15, 17), (15, 19), (15, 21), (17, 19), (12, 14), (14, 16), (16, 18), (16, 20),
+    (16, 22), (18, 20), (11, 23), (12, 24), (23, 24), (23, 25), (24, 26), (25, 27), (26, 28),
+    (27, 29), (28, 30), (29, 31), (30, 32), (27, 31), (28, 32),
+], np.intp)
+
+
+def hasDisplay():
+    """False on Linux hosts without an X11 or Wayland display, where cv2.imshow cannot work"""
+    if sys.platform.startswith("linux"):
+        return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+    return True
+
+
+def _segments(landmarks, connections):
+    """(N, L, >=2) landmarks -> (N * K, 2, 2) int32 line segments for one cv2.polylines call"""
+    points = np.asarray(landmarks)[..., :2].astype(np.int32)
+    return points[:, connections, :].reshape(-1, 2, 2)
+
+
+def _cornerSegments(boxes, l=30):
+    """The eight corner strokes of FaceDetector.fancyDraw for every (x, y, w, h) box"""
+    x, y, w, h = (boxes[:, i] for i in range(4))
+    x1, y1 = x + w, y + h
+    ends = [
+        (x, y, x + l, y), (x, y, x, y + l), (x1, y, x1 - l, y), (x1, y, x1, y + l),
+        (x, y1, x + l, y1), (x, y1, x, y1 - l), (x1, y1, x1 - l, y1), (x1, y1, x1, y1 - l),
+    ]
+    return np.stack([np.stack(end, axis=-1) for end in ends], axis=1).reshape(-1, 2, 2).astype(np.int32)
+
+
+class DisplaySink:
+    """Shows rendered frames in a window, returns False once q is pressed"""
+
+    def __init__(self, name="Image", delay=1):
+        self.name = name
+        self.delay = delay
+
+    def __call__(self, img):
+        cv2.imshow(self.name, img)
+        return cv2.waitKey(self.delay) & 0xFF != ord('q')
+
+    def close(self):
+        cv2.destroyWindow(self.name)
+
+
+class VideoSink:
+    """Writes rendered frames to a video file, opened on the first frame"""
+
+    def __init__(self, path, fps=30, fourcc="mp4v"):
+        self.path = path
+        self.fps = fps
+        self.fourcc = fourcc
+        self.writer = None
+
+    def __call__(self, img):
+        if self.writer is None:
+            h, w = img.shape[:2]
+            self.writer = cv2.VideoWriter(self.path, cv2.VideoWriter_fourcc(*self.fourcc), self.fps, (w, h))
+        self.writer.write(img)
+        return True
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.release()
+
+
+class Renderer:
+    """Draws detector results in one pass per frame, and only when a sink is attached.
+
+    Results are the pure FaceResult, HandResult and PoseResult tuples of the detectors' detect()
+    methods. Overlays go onto a reused copy of the frame, never onto the frame itself, so other
+    consumers of that frame see it untouched. All line work of a kind goes through a single
+    cv2.polylines call.
+    """
+
+    def __init__(self, sinks=None):
+        self.sinks = list(sinks or [])
+        self._canvas = None
+
+    def attach(self, sink):
+        self.sinks.append(sink)
+        return sink
+
+    @property
+    def active(self):
+        return bool(self.sinks)
+
+    def draw(self, img, results, fps=None):
+        """Returns a copy of img with every result drawn on it"""
+        if self._canvas is None or self._canvas.shape != img.shape:
+            self._canvas = np.empty_like(img)
+        canvas = self._canvas
+        np.copyto(canvas, img)
+        for result in results:
+            if result is None:
+                continue
+            if hasattr(result, "boxes"):
+                self._drawFaces(canvas, result)
+            elif result.landmarks.shape[1] == HAND_POINTS:
+                self._drawLandmarks(canvas, result.landmarks, HAND_CONNECTIONS)
+            else:
+                self._drawLandmarks(canvas, result.landmarks, POSE_CONNECTIONS,
+                                    getattr(result, "visibility", None))
+        if fps is not None:
+            cv2.putText(canvas, f'FPS: {int(fps)}', (20, 70), cv2.FONT_HERSHEY_PLAIN, 3, (0, 255, 0), 2)
+        return canvas
+
+    def render(self, img, results, fps=None):
+        """Draws and feeds every sink, returns False when a sink asks to stop"""
+        if not self.sinks:
+            return True
+        canvas = self.draw(img, results, fps)
+        keepGoing = True
+        for sink in self.sinks:
+            if sink(canvas) is False:
+                keepGoing = False
+        return keepGoing
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+    def _drawLandmarks(self, img, landmarks, connections, visibility=None):
+        if not len(landmarks):
+            return
+        # the upper-body pose graph returns fewer landmarks than the full connection table covers
+        connections = connections[(connections < landmarks.shape[1]).all(axis=1)]
+        if visibility is not None:
+            # like mediapipe's drawing_utils, skip what the model itself is unsure about
+            landmarks = np.where((visibility >= 0.5)[..., None], landmarks, np.nan)
+            keep = ~np.isnan(landmarks[:, connections, 0]).any(axis=-1)
+            segments = _segments(np.nan_to_num(landmarks), connections)[keep.reshape(-1)]
+        else:
+            segments = _segments(landmarks, connections)
+        if len(segments):
+            cv2.polylines(img, segments, False, (224, 224, 224), 2)
+        for x, y in landmarks[..., :2].reshape(-1, 2):
+            if not np.isnan(x):
+                cv2.circle(img, (int(x), int(y)), 3, (0, 0, 255), cv2.FILLED)
+
+    def _drawFaces(self, img, result):
+        if not len(result.boxes):
+            return
+        boxes = np.asarray(result.boxes, np.int32)
+        x, y, w, h = (boxes[:, i] for i in range(4))
+        rects = np.stack([np.stack([x, y], -1), np.stack([x + w, y], -1),
+                          np.stack([x + w, y + h], -1), np.stack([x, y + h], -1)], axis=1)
+        cv2.polylines(img, rects, True, (255, 0, 255), 1)
+        cv2.polylines(img, _cornerSegments(boxes), False, (255, 0, 255), 5)
+        for (bx, by, bw, bh), score in zip(boxes.tolist(), result.scores):
+            cv2.putText(img, f'{int(score * 100)}%', (bx, by - 20), cv2.FONT_HERSHEY_PLAIN,
+                        2, (255, 0, 255), 2)
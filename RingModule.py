@@ -0,0 +1,285 @@
+import argparse
+import multiprocessing
+import os
+import time
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+
+
+# writeSeq, slots, height, width, channels, maxReaders
+META = 6
+WRITE_SEQ = 0
+ALIGN = 64
+
+
+# names of the segments this process created and still has to unlink
+_created = set()
+
+
+def createSharedMemory(size, name=None):
+    """Creates a shared memory segment this process owns and unlinks with unlinkSharedMemory"""
+    shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+    _created.add(shm.name)
+    return shm
+
+
+def attachSharedMemory(name):
+    """Opens another process's shared memory segment without taking over its cleanup.
+
+    Before Python 3.13 every attach registers the segment with this process's resource tracker,
+    which then unlinks it at exit while the owner may still be using it. A segment this process
+    created itself keeps its registration, the tracker holds one entry per name and the owner's
+    unlink has to find it.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        if os.name == "posix" and shm.name not in _created:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def unlinkSharedMemory(shm):
+    """Closes and frees a segment made by createSharedMemory"""
+    _created.discard(shm.name)
+    shm.close()
+    shm.unlink()
+
+
+def _aligned(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _layout(slots, shape, maxReaders):
+    """Byte offsets of the meta, slot sequence, slot timestamp, reader and frame arrays, and the total size"""
+    meta = 0
+    seqs = _aligned(meta + META * 8)
+    times = _aligned(seqs + slots * 8)
+    readers = _aligned(times + slots * 8)
+    frames = _aligned(readers + maxReaders * 8)
+    return meta, seqs, times, readers, frames, frames + slots * int(np.prod(shape))
+
+
+class FrameRing:
+    """Ring buffer of fixed-shape uint8 frames in shared memory, for one writer and many readers.
+
+    Frame number seq lives in slot seq % slots. The writer marks the slot as being written (-1),
+    fills it, stamps it with seq and only then advances writeSeq, so a reader that finds the
+    slot's stamp equal to the seq it wanted before and after using the frame knows the frame
+    was complete and untouched (a seqlock). Nothing is ever locked: every reader keeps its own
+    position in a shared array entry only it writes, which lets the writer see how far behind
+    the slowest reader is and, with block set, wait instead of overwriting what it has not read.
+
+    Create the ring in the capturing process with FrameRing.create(shape), hand `name` to the
+    workers and open it there with FrameRing.attach(name).
+    """
+
+    def __init__(self, shm, owner=False):
+        self.shm = shm
+        self.owner = owner
+        meta = np.ndarray((META,), np.int64, shm.buf)
+        self.slots, h, w, c, self.maxReaders = (int(v) for v in meta[1:])
+        self.shape = (h, w, c)
+        offsets = _layout(self.slots, self.shape, self.maxReaders)
+        self.meta = meta
+        self.seqs = np.ndarray((self.slots,), np.int64, shm.buf, offsets[1])
+        self.times = np.ndarray((self.slots,), np.float64, shm.buf, offsets[2])
+        self.readers = np.ndarray((self.maxReaders,), np.int64, shm.buf, offsets[3])
+        self.frames = np.ndarray((self.slots,) + self.shape, np.uint8, shm.buf, offsets[4])
+
+    @classmethod
+    def create(cls, shape, slots=8, maxReaders=8, name=None):
+        shape = tuple(shape) + (() if len(shape) == 3 else (1,))
+        size = _layout(slots, shape, maxReaders)[-1]
+        shm = createSharedMemory(size, name)
+        meta = np.ndarray((META,), np.int64, shm.buf)
+        meta[:] = (-1, slots, shape[0], shape[1], shape[2], maxReaders)
+        ring = cls(shm, owner=True)
+        ring.seqs[:] = -1
+        ring.readers[:] = -1
+        return ring
+
+    @classmethod
+    def attach(cls, name):
+        return cls(attachSharedMemory(name))
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def writeSeq(self):
+        """Number of the newest complete frame, -1 before the first one"""
+        return int(self.meta[WRITE_SEQ])
+
+    def slowestReader(self):
+        """Lowest position of the attached readers, None when there are none"""
+        active = self.readers[self.readers >= 0]
+        return int(active.min()) if len(active) else None
+
+    def write(self, img, timestamp=None, block=False, poll=0.001):
+        """Copies img into the next slot and returns its frame number.
+
+        With block set the writer waits while the slowest reader still has to read the frame
+        this would overwrite, otherwise slow readers just lose frames.
+        """
+        seq = self.writeSeq + 1
+        if block:
+            while True:
+                slowest = self.slowestReader()
+                if slowest is None or seq - slowest < self.slots:
+                    break
+                time.sleep(poll)
+        i = seq % self.slots
+        self.seqs[i] = -1
+        self.frames[i].reshape(np.shape(img))[...] = img
+        self.times[i] = time.time() if timestamp is None else timestamp
+        self.seqs[i] = seq
+        self.meta[WRITE_SEQ] = seq
+        return seq
+
+    def valid(self, seq):
+        """True while frame seq is still in its slot, check after using a frame read by reference"""
+        return seq >= 0 and int(self.seqs[seq % self.slots]) == seq
+
+    def frame(self, seq):
+        """(timestamp, view) of frame seq, or None once it has been overwritten"""
+        i = seq % self.slots
+        timestamp = float(self.times[i])
+        if int(self.seqs[i]) != seq:
+            return None
+        return timestamp, self.frames[i]
+
+    def reader(self, index):
+        return RingReader(self, index)
+
+    def close(self):
+        """Detaches, the creating process also frees the segment"""
+        self.meta = self.seqs = self.times = self.readers = self.frames = None
+        if self.owner:
+            unlinkSharedMemory(self.shm)
+        else:
+            self.shm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RingReader:
+    """One reader's position in a FrameRing, kept in the ring's reader array entry `index`.
+
+    Frames are returned as views into shared memory, nothing is copied. A view stays usable
+    until the writer comes round to its slot again, ring.valid(seq) tells whether that happened
+    while the frame was in use; pass copy=True to get a private copy checked the same way.
+    """
+
+    def __init__(self, ring, index):
+        if ring.readers[index] >= 0:
+            raise ValueError(f"reader {index} is already in use")
+        self.ring = ring
+        self.index = index
+        self.dropped = 0
+        # start at the newest frame, older ones are not interesting to a reader that just arrived
+        ring.readers[index] = max(ring.writeSeq, 0)
+        self._next = ring.writeSeq + 1 if ring.writeSeq >= 0 else 0
+
+    def _read(self, seq, copy):
+        found = self.ring.frame(seq)
+        if found is None:
+            return None
+        timestamp, img = found
+        if copy:
+            img = img.copy()
+            if not self.ring.valid(seq):
+                return None
+        return seq, timestamp, img
+
+    def readNext(self, copy=False):
+        """(seq, timestamp, img) of the next unread frame, None when there is none yet.
+
+        Frames the writer already overwrote are skipped and counted in dropped.
+        """
+        while True:
+            writeSeq = self.ring.writeSeq
+            if self._next > writeSeq:
+                return None
+            oldest = writeSeq - self.ring.slots + 1
+            if self._next < oldest:
+                self.dropped += oldest - self._next
+                self._next = oldest
+            seq = self._next
+            self._next += 1
+            self.ring.readers[self.index] = seq
+            item = self._read(seq, copy)
+            if item is not None:
+                return item
+            self.dropped += 1
+
+    def readLatest(self, copy=False):
+        """(seq, timestamp, img) of the newest frame not read yet, skipping any in between"""
+        writeSeq = self.ring.writeSeq
+        if writeSeq >= self._next:
+            self.dropped += writeSeq - self._next
+            self._next = writeSeq
+        return self.readNext(copy)
+
+    def close(self):
+        self.ring.readers[self.index] = -1
+
+
+def _worker(name, index, model):
+    from BatchModule import detectLandmarks, makeDetector
+
+    ring = FrameRing.attach(name)
+    reader = ring.reader(index)
+    detector = makeDetector(model).warmup()
+    try:
+        while True:
+            item = reader.readLatest()
+            if item is None:
+                time.sleep(0.001)
+                continue
+            seq, timestamp, img = item
+            result = detectLandmarks(detector, model, img)
+            if ring.valid(seq):
+                print(f'worker {index}: frame {seq}, {len(result)} detections, {time.time() - timestamp:.3f}s old')
+    finally:
+        reader.close()
+        ring.close()
+
+
+def main():
+    from CameraModule import CameraSource
+
+    parser = argparse.ArgumentParser(description="Capture into a shared-memory ring read by detector processes")
+    parser.add_argument("--model", default="hand")
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    cap = CameraSource(0).start()
+    success, img = cap.read()
+    if not success:
+        return
+    with FrameRing.create(img.shape, maxReaders=args.workers) as ring:
+        workers = [multiprocessing.Process(target=_worker, args=(ring.name, i, args.model), daemon=True)
+                   for i in range(args.workers)]
+        for worker in workers:
+            worker.start()
+        try:
+            while success:
+                ring.write(img)
+                success, img = cap.read()
+        except KeyboardInterrupt:
+            pass
+        for worker in workers:
+            worker.terminate()
+            worker.join()
+    cap.release()
+
+
+if __name__ == "__main__":
+    main()
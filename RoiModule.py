@@ -0,0 +1,87 @@
+import math
+
+
+class RoiTracker:
+    """Decides when a detector may run on a crop around its last detection instead of the full frame.
+
+    Boxes and crops are (xmin, ymin, xmax, ymax) in normalized [0, 1] frame coordinates, so the
+    tracker works the same whatever resolution the detector is fed. Full-frame detection runs
+    every `interval` frames, or straight away once the subject is lost or its score drops below
+    `minScore`. In between, the crop is the last box shifted by the last per-frame motion and
+    grown by `margin` times its longer side plus that motion on each side.
+
+    Only FaceDetector uses it. MediaPipe's hand and pose graphs already track a crop around the
+    last detection between frames and skip their detector there, which a crop fed from outside
+    would only undo.
+    """
+
+    def __init__(self, interval=5, margin=0.5, minScore=0.5):
+        self.interval = interval
+        self.margin = margin
+        self.minScore = minScore
+        self.box = None
+        self.velocity = (0.0, 0.0)
+        self.crop = None
+        self.sinceKeyframe = 0
+
+    def reset(self):
+        """Forgets the last detection, the next frame is a full-frame keyframe"""
+        self.box = None
+        self.velocity = (0.0, 0.0)
+        self.crop = None
+        self.sinceKeyframe = 0
+
+    def nextCrop(self):
+        """Returns the crop for the next frame, or None when it has to be a full-frame keyframe"""
+        self.crop = None
+        if self.box is None or self.sinceKeyframe >= self.interval - 1:
+            return None
+        x0, y0, x1, y1 = self.box
+        vx, vy = self.velocity
+        size = max(x1 - x0, y1 - y0)
+        mx = size * self.margin + abs(vx)
+        my = size * self.margin + abs(vy)
+        crop = (max(0.0, x0 + vx - mx), max(0.0, y0 + vy - my),
+                min(1.0, x1 + vx + mx), min(1.0, y1 + vy + my))
+        if crop[2] <= crop[0] or crop[3] <= crop[1]:
+            return None
+        self.crop = crop
+        return crop
+
+    def cropImage(self, img):
+        """Returns the pixel-aligned view of img for the current crop, or img itself on keyframes"""
+        if self.crop is None:
+            return img
+        h, w = img.shape[:2]
+        x0, y0, x1, y1 = self.crop
+        px0, py0 = int(x0 * w), int(y0 * h)
+        px1, py1 = max(px0 + 1, math.ceil(x1 * w)), max(py0 + 1, math.ceil(y1 * h))
+        # snap to whole pixels so mapping results back is exact
+        self.crop = (px0 / w, py0 / h, px1 / w, py1 / h)
+        return img[py0:py1, px0:px1]
+
+    def toFrame(self, x, y):
+        """Maps a normalized point in the crop back to normalized frame coordinates"""
+        if self.crop is None:
+            return x, y
+        x0, y0, x1, y1 = self.crop
+        return x0 + x * (x1 - x0), y0 + y * (y1 - y0)
+
+    def toFrameSize(self, w, h):
+        """Maps a normalized width and height in the crop back to normalized frame coordinates"""
+        if self.crop is None:
+            return w, h
+        x0, y0, x1, y1 = self.crop
+        return w * (x1 - x0), h * (y1 - y0)
+
+    def update(self, box, score):
+        """Records the frame-coordinate box around everything detected, None when nothing was"""
+        if box is None or score < self.minScore:
+            self.box = None
+            self.velocity = (0.0, 0.0)
+        else:
+            if self.box is not None:
+                self.velocity = ((box[0] + box[2] - self.box[0] - self.box[2]) / 2,
+                                 (box[1] + box[3] - self.box[1] - self.box[3]) / 2)
+            self.box = box
+        self.sinceKeyframe = 0 if self.crop is None else self.sinceKeyframe + 1
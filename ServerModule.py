@@ -0,0 +1,273 @@
+import argparse
+import asyncio
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+
+from BatchModule import MODELS, detectLandmarks, detectorPool, resultShape
+from RingModule import attachSharedMemory, createSharedMemory, unlinkSharedMemory
+
+
+JPEG = 0
+RAW = 1
+SHM = 2
+TRANSPORTS = {"jpeg": JPEG, "raw": RAW, "shm": SHM}
+
+OK = 0
+ERROR = 1
+
+# frameId, model index, transport, frame height, frame width, payload length
+REQUEST = struct.Struct("<IBBHHI")
+# frameId, model index, status, number of detections, payload length
+RESPONSE = struct.Struct("<IBBHI")
+
+
+def decodeFrame(transport, height, width, payload, segments=None):
+    """BGR frame of one request; for SHM the payload is the segment name, looked up in segments"""
+    if transport == JPEG:
+        img = cv2.imdecode(np.frombuffer(payload, np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            raise ValueError("undecodable JPEG")
+        return img
+    if transport == RAW:
+        return np.frombuffer(payload, np.uint8).reshape(height, width, 3)
+    if transport == SHM:
+        name = bytes(payload).decode()
+        if segments is None:
+            segments = {}
+        if name not in segments:
+            segments[name] = attachSharedMemory(name)
+        return np.ndarray((height, width, 3), np.uint8, segments[name].buf)
+    raise ValueError(f"unknown transport {transport}")
+
+
+class FrameServer:
+    """Runs frames sent by many clients over TCP through shared detectors and sends back landmarks.
+
+    A request is a REQUEST header and a payload: JPEG bytes, raw (height, width, 3) BGR bytes,
+    or the name of a shared memory segment holding the raw frame at offset 0 for clients on the
+    same host. The reply is a RESPONSE header and the float32 detections in the layout of
+    BatchModule.detectLandmarks: (count, 5) [x, y, w, h, score] for faces, (count, 21|33|25, 3)
+    pixel x, y, z for hands and pose. Clients get replies in the order they sent frames.
+
+    Requests of all clients are gathered for up to `batchWindow` seconds or `batchSize` frames
+    and then decoded and detected together on `workers` threads, each with its own detectors
+    borrowed from detectorPool. MediaPipe's solutions take one image per call, so a batch shares
+    the workers rather than a single inference call. A client gets its next frame read only after
+    the reply to the previous one went out, so a busy server slows clients down through TCP
+    instead of queueing frames. Hand and pose detectors run in static image mode since one
+    detector sees frames of every client.
+    """
+
+    def __init__(self, host="127.0.0.1", port=9200, workers=2, batchSize=8, batchWindow=0.005, params=None,
+                 metrics=None):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.batchSize = batchSize
+        self.batchWindow = batchWindow
+        # per model constructor arguments, e.g. {"hand": {"maxHands": 4}}
+        self.params = {model: dict((params or {}).get(model, {})) for model in MODELS}
+        for model in ("hand", "pose"):
+            self.params[model].setdefault("mode", True)
+        # optional MetricsRegistry that records batch sizes and per-frame timings
+        self.metrics = metrics
+        self.executor = ThreadPoolExecutor(workers)
+        self._local = threading.local()
+        self._borrowed = []
+        self._lock = threading.Lock()
+        self._queue = None
+        self._server = None
+
+    def _detector(self, model):
+        """The calling worker thread's own detector of a model"""
+        detectors = getattr(self._local, "detectors", None)
+        if detectors is None:
+            detectors = self._local.detectors = {}
+        if model not in detectors:
+            detectors[model] = detectorPool.acquire(model, **self.params[model])
+            with self._lock:
+                self._borrowed.append(detectors[model])
+        return detectors[model]
+
+    def _process(self, model, transport, height, width, payload, segments):
+        sTime = time.perf_counter()
+        img = decodeFrame(transport, height, width, payload, segments)
+        result = detectLandmarks(self._detector(model), model, img)
+        if self.metrics is not None:
+            self.metrics.observe(f"server_{model}_frame_seconds", time.perf_counter() - sTime)
+        return np.ascontiguousarray(result, "<f4")
+
+    async def _batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batchWindow
+            while len(batch) < self.batchSize:
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    break
+            if self.metrics is not None:
+                self.metrics.observe("server_batch_size", len(batch))
+            # grouped by model so a worker's detector stays warm for consecutive frames
+            batch.sort(key=lambda job: job[1][0])
+            jobs = [loop.run_in_executor(self.executor, self._process, *args) for future, args in batch]
+            for (future, args), result in zip(batch, await asyncio.gather(*jobs, return_exceptions=True)):
+                if not future.done():
+                    future.set_result(result)
+
+    async def _client(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        segments = {}
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(REQUEST.size)
+                except asyncio.IncompleteReadError:
+                    break
+                frameId, modelIndex, transport, height, width, length = REQUEST.unpack(header)
+                payload = await reader.readexactly(length)
+                if modelIndex >= len(MODELS):
+                    writer.write(RESPONSE.pack(frameId, modelIndex, ERROR, 0, 0))
+                    await writer.drain()
+                    continue
+                model = MODELS[modelIndex]
+                future = loop.create_future()
+                await self._queue.put((future, (model, transport, height, width, payload, segments)))
+                result = await future
+                if isinstance(result, Exception):
+                    writer.write(RESPONSE.pack(frameId, modelIndex, ERROR, 0, 0))
+                else:
+                    data = result.tobytes()
+                    writer.write(RESPONSE.pack(frameId, modelIndex, OK, len(result), len(data)) + data)
+                await writer.drain()
+                if self.metrics is not None:
+                    self.metrics.inc("server_frames_total")
+        except ConnectionError:
+            pass
+        finally:
+            for shm in segments.values():
+                shm.close()
+            writer.close()
+
+    async def serve(self):
+        """Accepts clients until cancelled"""
+        self._queue = asyncio.Queue()
+        batcher = asyncio.create_task(self._batches())
+        self._server = await asyncio.start_server(self._client, self.host, self.port)
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        finally:
+            batcher.cancel()
+            self.close()
+
+    def close(self):
+        self.executor.shutdown()
+        with self._lock:
+            for detector in self._borrowed:
+                detectorPool.release(detector)
+            self._borrowed = []
+
+
+class FrameClient:
+    """Blocking stand-in client of a FrameServer, one request in flight at a time"""
+
+    def __init__(self, host="127.0.0.1", port=9200, transport="jpeg", quality=80, params=None):
+        self.sock = socket.create_connection((host, port))
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.transport = TRANSPORTS[transport]
+        self.quality = quality
+        # the server's per model constructor arguments, they decide the shape of a detection
+        self.params = dict(params or {})
+        self.frameId = 0
+        self._shm = None
+
+    def _payload(self, img):
+        if self.transport == JPEG:
+            success, data = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            return data.tobytes()
+        if self.transport == RAW:
+            return np.ascontiguousarray(img).tobytes()
+        if self._shm is None or self._shm.size < img.nbytes:
+            if self._shm is not None:
+                unlinkSharedMemory(self._shm)
+            self._shm = createSharedMemory(img.nbytes)
+        np.ndarray(img.shape, np.uint8, self._shm.buf)[...] = img
+        return self._shm.name.encode()
+
+    def _recv(self, size):
+        data = bytearray()
+        while len(data) < size:
+            chunk = self.sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("server closed the connection")
+            data += chunk
+        return bytes(data)
+
+    def detect(self, img, model="hand"):
+        """Sends one BGR frame and returns its detections, see FrameServer for the layout"""
+        payload = self._payload(img)
+        h, w = img.shape[:2]
+        self.sock.sendall(REQUEST.pack(self.frameId, MODELS.index(model), self.transport, h, w, len(payload)) + payload)
+        self.frameId = (self.frameId + 1) & 0xFFFFFFFF
+        frameId, modelIndex, status, count, length = RESPONSE.unpack(self._recv(RESPONSE.size))
+        data = self._recv(length)
+        if status != OK:
+            raise RuntimeError(f"server failed on frame {frameId}")
+        return np.frombuffer(data, "<f4").reshape((count,) + resultShape(model, self.params.get(model)))
+
+    def close(self):
+        self.sock.close()
+        if self._shm is not None:
+            unlinkSharedMemory(self._shm)
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve detectors to thin clients, or run a stand-in client")
+    parser.add_argument("--client", action="store_true", help="send webcam frames to a running server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9200)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--model", choices=MODELS, default="hand")
+    parser.add_argument("--transport", choices=TRANSPORTS, default="jpeg")
+    args = parser.parse_args()
+
+    if not args.client:
+        try:
+            asyncio.run(FrameServer(args.host, args.port, args.workers).serve())
+        except KeyboardInterrupt:
+            pass
+        return
+
+    from CameraModule import CameraSource
+
+    cap = CameraSource(0).start()
+    pTime = 0
+    with FrameClient(args.host, args.port, args.transport) as client:
+        while True:
+            success, img = cap.read()
+            if not success:
+                break
+            result = client.detect(img, args.model)
+            cTime = time.time()
+            fps = 1 / max(cTime - pTime, 1e-6)
+            pTime = cTime
+            print(f'FPS: {int(fps)}', len(result))
+    cap.release()
+
+
+if __name__ == "__main__":
+    main()
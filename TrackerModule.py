@@ -0,0 +1,124 @@
+from collections import deque
+import numpy as np
+
+
+def landmarkBoxes(landmarks):
+    """(N, L, >=2) landmark array -> (N, 4) float32 array of (x, y, w, h) boxes around each subject"""
+    landmarks = np.asarray(landmarks, np.float32)
+    if not len(landmarks):
+        return np.empty((0, 4), np.float32)
+    lo = landmarks[..., :2].min(axis=1)
+    hi = landmarks[..., :2].max(axis=1)
+    return np.concatenate([lo, hi - lo], axis=1)
+
+
+def iouMatrix(a, b):
+    """Pairwise IoU of (T, 4) and (D, 4) arrays of (x, y, w, h) boxes"""
+    ax0, ay0, ax1, ay1 = a[:, 0:1], a[:, 1:2], a[:, 0:1] + a[:, 2:3], a[:, 1:2] + a[:, 3:4]
+    bx0, by0, bx1, by1 = b[:, 0], b[:, 1], b[:, 0] + b[:, 2], b[:, 1] + b[:, 3]
+    iw = np.clip(np.minimum(ax1, bx1) - np.maximum(ax0, bx0), 0, None)
+    ih = np.clip(np.minimum(ay1, by1) - np.maximum(ay0, by0), 0, None)
+    inter = iw * ih
+    union = a[:, 2:3] * a[:, 3:4] + b[:, 2] * b[:, 3] - inter
+    return inter / np.maximum(union, 1e-9)
+
+
+def centroidMatrix(a, b):
+    """Pairwise centroid distance of (T, 4) and (D, 4) boxes, in units of each track box's diagonal"""
+    ca = a[:, :2] + a[:, 2:] / 2
+    cb = b[:, :2] + b[:, 2:] / 2
+    dist = np.linalg.norm(ca[:, None, :] - cb[None, :, :], axis=-1)
+    return dist / np.maximum(np.linalg.norm(a[:, 2:], axis=1, keepdims=True), 1e-9)
+
+
+def greedyAssign(score, threshold):
+    """Pairs rows and columns best score first, ignoring pairs below threshold"""
+    pairs = []
+    if not score.size:
+        return pairs
+    usedRows, usedCols = set(), set()
+    order = np.argsort(score, axis=None)[::-1]
+    for row, col in zip(*np.unravel_index(order, score.shape)):
+        if score[row, col] < threshold or len(pairs) == min(score.shape):
+            break
+        if row in usedRows or col in usedCols:
+            continue
+        usedRows.add(row)
+        usedCols.add(col)
+        pairs.append((int(row), int(col)))
+    return pairs
+
+
+class Track:
+    def __init__(self, id, box, frameNo, historySize):
+        self.id = id
+        self.box = box
+        self.hits = 1
+        self.misses = 0
+        self.history = deque([(frameNo, box)], maxlen=historySize)
+
+
+class SubjectTracker:
+    """Gives detections ids that stay the same from frame to frame.
+
+    Boxes are (x, y, w, h) in any consistent unit. Each frame they are matched to the live tracks
+    greedily, best pair first, by IoU (metric="iou", pairs need at least `threshold` overlap) or
+    by centroid distance (metric="centroid", pairs need to be within `threshold` track diagonals).
+    Unmatched boxes start new tracks, and a track missing for more than `maxAge` frames dies.
+    The last `historySize` boxes of every track are kept.
+    """
+
+    def __init__(self, metric="iou", threshold=0.3, maxAge=5, historySize=30):
+        if metric not in ("iou", "centroid"):
+            raise ValueError(f"unknown metric {metric!r}")
+        self.metric = metric
+        self.threshold = threshold
+        self.maxAge = maxAge
+        self.historySize = historySize
+        self.tracks = {}
+        self.frameNo = 0
+        self._nextId = 0
+
+    def reset(self):
+        """Drops every track, ids start again from 0"""
+        self.tracks = {}
+        self.frameNo = 0
+        self._nextId = 0
+
+    def update(self, boxes):
+        """Returns the track id of every box, in the order the boxes were given"""
+        boxes = np.asarray(boxes, np.float32).reshape(-1, 4)
+        tracks = list(self.tracks.values())
+        ids = [None] * len(boxes)
+        if tracks and len(boxes):
+            trackBoxes = np.array([track.box for track in tracks], np.float32)
+            if self.metric == "iou":
+                pairs = greedyAssign(iouMatrix(trackBoxes, boxes), self.threshold)
+            else:
+                pairs = greedyAssign(-centroidMatrix(trackBoxes, boxes), -self.threshold)
+            for row, col in pairs:
+                track = tracks[row]
+                track.box = boxes[col]
+                track.hits += 1
+                track.misses = 0
+                track.history.append((self.frameNo, boxes[col]))
+                ids[col] = track.id
+        matched = set(id for id in ids if id is not None)
+        for track in tracks:
+            if track.id not in matched:
+                track.misses += 1
+                if track.misses > self.maxAge:
+                    del self.tracks[track.id]
+        for col, id in enumerate(ids):
+            if id is None:
+                track = Track(self._nextId, boxes[col], self.frameNo, self.historySize)
+                self.tracks[track.id] = track
+                ids[col] = track.id
+                self._nextId += 1
+        self.frameNo += 1
+        return ids
+
+    def history(self, id):
+        """(frameNo, box) pairs of a live track, oldest first"""
+        track = self.tracks.get(id)
+        return list(track.history) if track else []
@@ -1,4 +1,6 @@
 import cv2
+import os
+import sys
 import time
 import numpy as np
 import HandTrackingModule as htm
@@ -7,16 +9,24 @@ from ctypes import cast, POINTER
 from comtypes import CLSCTX_ALL
 from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
 
+# the shared modules live one directory up, next to main.py, and are not on the path when run from here
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import FilterModule as fm
+import GestureModule as gem
+from CameraModule import CameraSource
+
 ################################
 wCam, hCam = 640, 480
 ################################
 
-cap = cv2.VideoCapture(1)
-cap.set(3, wCam)
-cap.set(4, hCam)
+cap = CameraSource(1, wCam, hCam).start()
 pTime = 0
 
 detector = htm.handDetector(detectionCon=0.7)
+# fingertip jitter would otherwise go straight into the volume level
+smoother = fm.OneEuroFilter(minCutoff=1.0, beta=0.05)
+# thumb and index tips closer than a quarter of the hand size, independent of the distance to the camera
+gestures = gem.GestureEngine({"pinch": {"distances": [(4, 8, None, 0.25)]}})
 
 devices = AudioUtilities.GetSpeakers()
 interface = devices.Activate(
@@ -34,11 +44,11 @@ while True:
     success, img = cap.read()
     img = detector.findHands(img)
     lmList = detector.findPosition(img, draw=False)
+    gestures.update(np.array(lmList).reshape(-1, 21, 3)[..., 1:])
     if len(lmList) != 0:
         # print(lmList[4], lmList[8])
 
-        x1, y1 = lmList[4][1], lmList[4][2]
-        x2, y2 = lmList[8][1], lmList[8][2]
+        (x1, y1), (x2, y2) = smoother.filter([[lmList[4][1:], lmList[8][1:]]])[0].astype(int).tolist()
         cx, cy = (x1 + x2) // 2, (y1 + y2) // 2
 
         cv2.circle(img, (x1, y1), 15, (255, 0, 255), cv2.FILLED)
@@ -58,8 +68,10 @@ while True:
         print(int(length), vol)
         volume.SetMasterVolumeLevel(vol, None)
 
-        if length < 50:
+        if "pinch" in gestures.active(0):
             cv2.circle(img, (cx, cy), 15, (0, 255, 0), cv2.FILLED)
+    else:
+        smoother.reset()
 
     cv2.rectangle(img, (50, 150), (85, 400), (255, 0, 0), 3)
     cv2.rectangle(img, (50, int(volBar)), (85, 400), (255, 0, 0), cv2.FILLED)
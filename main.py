@@ -1,7 +1,7 @@
 import sys
+import threading
+import time
 
-import cv2
-import numpy as np
 from PyQt5 import QtGui
 from PyQt5.QtCore import pyqtSignal, pyqtSlot, Qt, QThread, QDir, QUrl
 from PyQt5.QtGui import QPixmap, QIcon
@@ -9,24 +9,32 @@ from PyQt5.QtMultimedia import QMediaContent
 from PyQt5.QtWidgets import QWidget, QApplication, QLabel, QVBoxLayout, QAction, QFileDialog, QMainWindow, QSlider, \
     QSizePolicy, QHBoxLayout, QPushButton, QStyle, QGridLayout
 
-from FaceDetectionModule import FaceDetector
-from HandTrackingModules import HandDetector
+from BatchModule import detectorPool
+from CameraModule import CameraSource
+from MetricsModule import MetricsRegistry
+from PipelineModule import FrameSlot
+from PreprocessModule import FramePreprocessor
 
 
 class VideoThread(QThread):
-    change_pixmap_signal = pyqtSignal(np.ndarray)
-
-    def __init__(self):
+    def __init__(self, metrics=None, sink=None):
         super().__init__()
         self._run_flag = True
+        self.metrics = metrics
+        # called with every captured frame, must not block
+        self.sink = sink
 
     def run(self):
-        # capture from web cam
-        cap = cv2.VideoCapture(0)
+        # capture from web cam, the camera's own thread keeps only the newest frame
+        cap = CameraSource(0, metrics=self.metrics).start()
         while self._run_flag:
-            ret, cv_img = cap.read()
-            if ret:
-                self.change_pixmap_signal.emit(cv_img)
+            sTime = time.perf_counter()
+            ret, cv_img = cap.read(timeout=0.5)
+            if self.metrics is not None:
+                self.metrics.observe("video_read_seconds", time.perf_counter() - sTime)
+                self.metrics.inc("video_frames_total" if ret else "video_read_failures_total")
+            if ret and self.sink is not None:
+                self.sink(cv_img)
         # shut down capture system
         cap.release()
 
@@ -36,16 +44,112 @@ class VideoThread(QThread):
         self.wait()
 
 
+class DetectionThread(QThread):
+    """Runs detection on the newest captured frame and publishes the annotated frame for display.
+
+    Frames the worker has not got to yet are replaced by newer ones, so a slow detector never
+    holds up capture or the GUI. The mode can be switched at any time, it is read once per frame.
+    Detectors that were not passed in are borrowed from the shared detector pool the first time
+    their mode is switched on, so a window that never detects anything never loads a model.
+    """
+    # only carries a notification, the frame itself waits in self.slot
+    frame_ready_signal = pyqtSignal()
+    detections_signal = pyqtSignal(object)
+
+    def __init__(self, faceDetector=None, handDetector=None, metrics=None, display_size=(1400, 800)):
+        super().__init__()
+        self._run_flag = True
+        self.faceDetector = faceDetector
+        self.handDetector = handDetector
+        self._pooled = []
+        self.metrics = metrics
+        self.mode = None
+        self.dropped = 0
+        self._frame = None
+        self._cond = threading.Condition()
+        self.slot = FrameSlot()
+        # detectors share one resized RGB frame, the label gets its own label-sized one
+        self.preprocessor = FramePreprocessor(640)
+        self.displayPreprocessor = FramePreprocessor(*display_size, upscale=True)
+
+    def submit(self, cv_img):
+        """Queues a frame for detection, replacing one that has not been picked up yet"""
+        with self._cond:
+            if self._frame is not None:
+                self.dropped += 1
+            self._frame = cv_img
+            self._cond.notify()
+
+    def setMode(self, mode):
+        """None shows frames as they are, "face" and "hand" run the matching detector"""
+        self.mode = mode
+
+    def detector(self, mode):
+        """The detector of a mode, borrowed from detectorPool (built and warmed up) on first use"""
+        name = "faceDetector" if mode == "face" else "handDetector"
+        if getattr(self, name) is None:
+            detector = detectorPool.acquire(mode, metrics=self.metrics)
+            self._pooled.append(detector)
+            setattr(self, name, detector)
+        return getattr(self, name)
+
+    def run(self):
+        while self._run_flag:
+            with self._cond:
+                while self._frame is None and self._run_flag:
+                    self._cond.wait(0.1)
+                cv_img, self._frame = self._frame, None
+            if cv_img is None:
+                continue
+            mode = self.mode
+            if mode == "face":
+                imgRGB = self.preprocessor.process(cv_img)
+                cv_img, bboxs = self.detector(mode).findFaces(cv_img, imgRGB=imgRGB)
+                self.detections_signal.emit(bboxs)
+            elif mode == "hand":
+                imgRGB = self.preprocessor.process(cv_img)
+                handDetector = self.detector(mode)
+                cv_img = handDetector.findHands(cv_img, imgRGB=imgRGB)
+                self.detections_signal.emit(handDetector.findPositions(cv_img))
+            self.publish(cv_img)
+
+    def publish(self, cv_img):
+        """Scales and converts the frame for display straight into a pooled buffer"""
+        w, h, scale = self.displayPreprocessor.outputSize(cv_img.shape)
+        buf = self.slot.acquire((h, w, 3))
+        self.displayPreprocessor.process(cv_img, out=buf)
+        # while the GUI has a notification pending newer frames just replace the buffer
+        if self.slot.publish(buf):
+            self.frame_ready_signal.emit()
+        if self.metrics is not None:
+            self.metrics.set("detection_dropped_frames", self.dropped)
+            self.metrics.set("video_display_dropped_frames", self.slot.dropped)
+
+    def stop(self):
+        """Sets run flag to False and waits for thread to finish"""
+        with self._cond:
+            self._run_flag = False
+            self._cond.notify()
+        self.wait()
+        for detector in self._pooled:
+            detectorPool.release(detector)
+        self._pooled = []
+
+
 class MainWindow(QMainWindow):
     def __init__(self, parent=None):
         super(MainWindow, self).__init__(parent)
         self.setWindowTitle("Video Client")
-        self.thread = VideoThread()
-        self.faceDetector = FaceDetector()
-        self.handDetector = HandDetector()
+        # sampled so it is cheap enough to leave on, export with self.metrics.export or serve
+        self.metrics = MetricsRegistry(sampleEvery=10)
         # self.setWindowTitle("Qt live label demo")
         self.disply_width = 1400
         self.display_height = 800
+        # capture -> detection -> GUI, the GUI thread only paints; detectors load on first use
+        self.detectionThread = DetectionThread(metrics=self.metrics,
+                                               display_size=(self.disply_width, self.display_height))
+        self.detectionThread.frame_ready_signal.connect(self.update_image)
+        self.thread = VideoThread(self.metrics, self.detectionThread.submit)
 
         # create the label that holds the image
         self.image_label = QLabel(self)
@@ -113,63 +217,49 @@ class MainWindow(QMainWindow):
 
     def closeEvent(self, event):
         self.thread.stop()
+        self.detectionThread.stop()
         event.accept()
 
-    @pyqtSlot(np.ndarray)
-    def update_image(self, cv_img):
-        """Updates the image_label with a new opencv image"""
-
-        qt_img = self.convert_cv_qt(cv_img)
-        self.image_label.setPixmap(qt_img)
-
-    @pyqtSlot(np.ndarray)
-    def update_faceimage(self, cv_img):
-        """Updates the image_label with a new opencv image"""
-        cv_faceimg, bbox = self.faceDetector.findFaces(cv_img)
-        qt_img = self.convert_cv_qt(cv_faceimg)
-        self.image_label.setPixmap(qt_img)
-
-    @pyqtSlot(np.ndarray)
-    def update_handimage(self, cv_img):
-        """Updates the image_label with a new opencv image"""
-        cv_hangimg = self.handDetector.findHands(cv_img)
-        qt_img = self.convert_cv_qt(cv_hangimg)
-        self.image_label.setPixmap(qt_img)
-
-    def convert_cv_qt(self, cv_img):
-        """Convert from an opencv image to QPixmap"""
-        rgb_image = cv2.cvtColor(cv_img, cv2.COLOR_BGR2RGB)
-
+    @pyqtSlot()
+    def update_image(self):
+        """Updates the image_label with the newest frame the detection thread published"""
+        rgb_image = self.detectionThread.slot.take()
+        if rgb_image is not None:
+            qt_img = self.convert_cv_qt(rgb_image)
+            self.image_label.setPixmap(qt_img)
+
+    def convert_cv_qt(self, rgb_image):
+        """Convert a label-sized RGB frame to QPixmap"""
+        # the detection thread already scaled and converted it into a pooled buffer,
+        # fromImage is the only copy left
         h, w, ch = rgb_image.shape
 
         bytes_per_line = ch * w
         convert_to_Qt_format = QtGui.QImage(rgb_image.data, w, h, bytes_per_line, QtGui.QImage.Format_RGB888)
-        p = convert_to_Qt_format.scaled(self.disply_width, self.display_height, Qt.KeepAspectRatio)
-        return QPixmap.fromImage(p)
+        return QPixmap.fromImage(convert_to_Qt_format)
 
     def openWebCam(self):
-        # connect its signal to the update_image slot
-        self.thread.change_pixmap_signal.connect(self.update_image)
-        # start the thread
+        # start the threads
+        self.detectionThread.start()
         self.thread.start()
         self.detectFaceBtn.setEnabled(True)
         self.detectHandBtn.setEnabled(True)
 
     def detectFace(self):
-        self.thread.change_pixmap_signal.disconnect(self.update_image)
-        self.thread.change_pixmap_signal.connect(self.update_faceimage)
-        # start the thread
-        self.thread.start()
-        self.detectFaceBtn.setIcon(self.style().standardIcon(QStyle.SP_MediaStop))
+        self.switchMode("face")
 
     def detectHands(self):
-        if self.detectHandBtn.setEnabled(True):
-            self.thread.change_pixmap_signal.disconnect(self.update_faceimage)
-        # self.thread.change_pixmap_signal.disconnect(self.update_image)
-
-        self.thread.change_pixmap_signal.connect(self.update_handimage)
-        # start the thread
-        self.thread.start()
+        self.switchMode("hand")
+
+    def switchMode(self, mode):
+        """Turns a detection mode on, or off again when it is already on"""
+        if self.detectionThread.mode == mode:
+            mode = None
+        self.detectionThread.setMode(mode)
+        self.detectFaceBtn.setIcon(self.style().standardIcon(
+            QStyle.SP_MediaStop if mode == "face" else QStyle.SP_MediaPlay))
+        self.detectHandBtn.setIcon(self.style().standardIcon(
+            QStyle.SP_MediaStop if mode == "hand" else QStyle.SP_FileIcon))
 
     def openFile(self):
         fileName, _ = QFileDialog.getOpenFileName(self, 'Open Video', QDir.homePath())
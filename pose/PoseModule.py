@@ -1,46 +1,141 @@
+from collections import namedtuple
 import cv2
-import mediapipe as mp
 import time
 import math
+import numpy as np
+
+
+# the full body graph returns 33 landmarks, the upBody one only the first 25
+POSE_POINTS = 33
+UPPER_BODY_POINTS = 25
+
+# landmarks: (N, L, 3) float32 pixel x, y, z, visibility: (N, L) float32, N is 0 or 1, L is 33 or 25
+PoseResult = namedtuple("PoseResult", ["landmarks", "visibility"])
 
 
 class poseDetector():
 
     def __init__(self, mode=False, upBody=False, smooth=True,
-                 detectionCon=0.5, trackCon=0.5):
+                 detectionCon=0.5, trackCon=0.5, metrics=None, motionGate=None):
 
         self.mode = mode
         self.upBody = upBody
         self.smooth = smooth
         self.detectionCon = detectionCon
         self.trackCon = trackCon
-
-        self.mpDraw = mp.solutions.drawing_utils
-        self.mpPose = mp.solutions.pose
-        self.pose = self.mpPose.Pose(self.mode, self.upBody, self.smooth,
-                                     self.detectionCon, self.trackCon)
-
-    def findPose(self, img, draw=True):
-        imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        self.results = self.pose.process(imgRGB)
+        # optional MetricsRegistry that records per-call timings and detection counts
+        self.metrics = metrics
+        # optional MotionGate, see MotionModule
+        self.motionGate = motionGate
+
+        # the graph is built on first use, see DetectorPool
+        self.mpDraw = None
+        self.mpPose = None
+        self._pose = None
+
+    @property
+    def pose(self):
+        if self._pose is None:
+            import mediapipe as mp
+            self.mpDraw = mp.solutions.drawing_utils
+            self.mpPose = mp.solutions.pose
+            self._pose = self.mpPose.Pose(self.mode, self.upBody, self.smooth,
+                                          self.detectionCon, self.trackCon)
+        return self._pose
+
+    @property
+    def built(self):
+        return self._pose is not None
+
+    def configure(self, **params):
+        """Changes constructor settings such as upBody, the graph is rebuilt on the next frame"""
+        for name, value in params.items():
+            if name not in ("mode", "upBody", "smooth", "detectionCon", "trackCon"):
+                raise TypeError(f"{name!r} cannot be configured")
+            setattr(self, name, value)
+        if self._pose is not None:
+            self._pose.close()
+            self._pose = None
+
+    def reset(self):
+        """Forgets the frames seen so far, see DetectorPool"""
+        if self._pose is not None and not self.mode:
+            self._pose.close()
+            self._pose = None
+        if self.motionGate is not None:
+            self.motionGate.reset()
+        self.results = None
+
+    def warmup(self, size=(480, 640)):
+        """Builds the graph ahead of the first frame, see DetectorPool"""
+        self.pose.process(np.zeros(tuple(size) + (3,), np.uint8))
+        return self
+
+    def findPose(self, img, draw=True, imgRGB=None):
+        # imgRGB: see FramePreprocessor
+        sTime = time.perf_counter()
+        if self.motionGate is not None and not self.motionGate.moved(img):
+            if self.metrics is not None:
+                self.metrics.inc("pose_skipped_frames_total")
+        else:
+            if imgRGB is None:
+                imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+            self.results = self.pose.process(imgRGB)
         if self.results.pose_landmarks:
             if draw:
                 self.mpDraw.draw_landmarks(img, self.results.pose_landmarks,
                                            self.mpPose.POSE_CONNECTIONS)
+        if self.metrics is not None:
+            self.metrics.observe("pose_find_seconds", time.perf_counter() - sTime)
+            self.metrics.inc("pose_frames_total")
+            self.metrics.set("pose_detections", 1 if self.results.pose_landmarks else 0)
         return img
 
+    def findLandmarks(self, img):
+        """Returns an (N, L, 3) float32 array of x, y, z pixel coordinates, N is 0 or 1, L is 33 or 25 with upBody"""
+        if not self.results.pose_landmarks:
+            return np.empty((0, UPPER_BODY_POINTS if self.upBody else POSE_POINTS, 3), np.float32)
+        h, w, c = img.shape
+        landmarks = np.array([[(lm.x, lm.y, lm.z) for lm in self.results.pose_landmarks.landmark]],
+                             dtype=np.float32)
+        landmarks *= np.array([w, h, w], np.float32)
+        return landmarks
+
+    def findPositions(self, img, draw=False):
+        """Returns an (N, L, 3) int32 array of [id, cx, cy] rows, see findLandmarks"""
+        landmarks = self.findLandmarks(img)
+        positions = np.empty(landmarks.shape, np.int32)
+        positions[..., 0] = np.arange(landmarks.shape[1])
+        positions[..., 1:] = landmarks[..., :2]
+        if draw:
+            for id, cx, cy in positions.reshape(-1, 3):
+                cv2.circle(img, (int(cx), int(cy)), 5, (255, 0, 0), cv2.FILLED)
+        return positions
+
     def findPosition(self, img, draw=True):
-        self.lmList = []
-        if self.results.pose_landmarks:
-            for id, lm in enumerate(self.results.pose_landmarks.landmark):
-                h, w, c = img.shape
-                # print(id, lm)
-                cx, cy = int(lm.x * w), int(lm.y * h)
-                self.lmList.append([id, cx, cy])
-                if draw:
-                    cv2.circle(img, (cx, cy), 5, (255, 0, 0), cv2.FILLED)
+        positions = self.findPositions(img, draw)
+        self.lmList = positions[0].tolist() if len(positions) else []
         return self.lmList
 
+    def detect(self, img, imgRGB=None):
+        """Runs detection without drawing on img and returns a PoseResult"""
+        self.findPose(img, False, imgRGB)
+        return self.findResult(img)
+
+    def findResult(self, img):
+        """Packs the last findPose call into a PoseResult"""
+        landmarks = self.findLandmarks(img)
+        visibility = np.empty(landmarks.shape[:2], np.float32)
+        if len(landmarks):
+            visibility[0] = [lm.visibility for lm in self.results.pose_landmarks.landmark]
+        return PoseResult(landmarks, visibility)
+
+    def stream(self, source, maxsize=1, dropPolicy="latest"):
+        """Async iterator of (frameNo, timestamp, img, PoseResult) over source, see AsyncModule.stream"""
+        # imported here so this module still runs as a script from inside pose/
+        import AsyncModule
+        return AsyncModule.stream(self.detect, source, maxsize, dropPolicy, self.metrics)
+
     def findAngle(self, img, p1, p2, p3, draw=True):
 
         # Get the landmarks
@@ -83,7 +178,7 @@ def main():
             cv2.circle(img, (lmList[14][1], lmList[14][2]), 15, (0, 0, 255), cv2.FILLED)
 
         cTime = time.time()
-        fps = 1 / (cTime - pTime)
+        fps = 1 / max(cTime - pTime, 1e-6)
         pTime = cTime
 
         cv2.putText(img, str(int(fps)), (70, 50), cv2.FONT_HERSHEY_PLAIN, 3,
@@ -0,0 +1,58 @@
+import os
+import sys
+import types
+
+import pytest
+
+# the modules live at the repository root and import each other by plain name
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+class FakeGraph:
+    """Stands in for a legacy MediaPipe solution graph, every frame shows one subject"""
+
+    built = 0
+
+    def __init__(self, *args):
+        FakeGraph.built += 1
+        self.args = args
+        self.frames = 0
+        self.closed = False
+
+    def landmarks(self, count):
+        return types.SimpleNamespace(landmark=[
+            types.SimpleNamespace(x=(i + 1) / (count + 1), y=0.5, z=0.0, visibility=0.9) for i in range(count)])
+
+    def process(self, img):
+        self.frames += 1
+        return self.result()
+
+    def close(self):
+        self.closed = True
+
+
+class FakePose(FakeGraph):
+    def result(self):
+        mode, upBody = self.args[:2]
+        return types.SimpleNamespace(pose_landmarks=self.landmarks(25 if upBody else 33))
+
+
+class FakeHands(FakeGraph):
+    def result(self):
+        return types.SimpleNamespace(multi_hand_landmarks=[self.landmarks(21)],
+                                     multi_handedness=[types.SimpleNamespace(
+                                         classification=[types.SimpleNamespace(score=0.9)])])
+
+
+@pytest.fixture
+def fakeMediapipe(monkeypatch):
+    """Installs a mediapipe module whose solutions are FakeGraphs, the detectors import it lazily"""
+    mp = types.ModuleType("mediapipe")
+    mp.solutions = types.SimpleNamespace(
+        pose=types.SimpleNamespace(Pose=FakePose, POSE_CONNECTIONS=()),
+        hands=types.SimpleNamespace(Hands=FakeHands, HAND_CONNECTIONS=()),
+        drawing_utils=types.SimpleNamespace(draw_landmarks=lambda *args: None),
+    )
+    monkeypatch.setitem(sys.modules, "mediapipe", mp)
+    FakeGraph.built = 0
+    return mp
@@ -0,0 +1,64 @@
+import asyncio
+import threading
+
+import pytest
+
+from AsyncModule import detectAsync, stream
+from PipelineModule import BLOCK
+
+from test_pipeline import FakeSource
+
+
+def pipelineThreads():
+    return [thread for thread in threading.enumerate() if thread.name.endswith(("(_capture)", "(_detect)"))]
+
+
+async def collect(detect, source, limit=None):
+    frameNos = []
+    async for frameNo, timestamp, img, result in stream(detect, source, dropPolicy=BLOCK):
+        frameNos.append(frameNo)
+        if len(frameNos) == limit:
+            break
+    return frameNos
+
+
+def test_stream_yields_every_frame_in_order():
+    assert asyncio.run(collect(lambda img: None, FakeSource(10))) == list(range(10))
+
+
+def test_detect_error_is_raised_from_async_for():
+    def detect(img):
+        if img[0, 0, 0] == 4:
+            raise ValueError("bad frame")
+
+    frameNos = []
+
+    async def consume():
+        async for frameNo, timestamp, img, result in stream(detect, FakeSource(10), dropPolicy=BLOCK):
+            frameNos.append(frameNo)
+
+    with pytest.raises(ValueError, match="bad frame"):
+        asyncio.run(consume())
+    assert frameNos == [0, 1, 2, 3]
+
+
+def test_source_error_is_raised_from_async_for():
+    with pytest.raises(OSError, match="camera gone"):
+        asyncio.run(collect(lambda img: None, FakeSource(3, OSError("camera gone"))))
+
+
+def test_leaving_the_loop_stops_the_pipeline_threads():
+    source = FakeSource(10 ** 6)
+    assert asyncio.run(collect(lambda img: None, source, limit=3)) == [0, 1, 2]
+    assert pipelineThreads() == []
+    read = source.read_count
+    # nothing reads the source any more
+    assert read < 10 ** 6 and source.read_count == read
+
+
+def test_detect_async_runs_off_the_event_loop():
+    async def run():
+        loopThread = threading.current_thread()
+        return await detectAsync(lambda img: (img, threading.current_thread() is loopThread), 7)
+
+    assert asyncio.run(run()) == (7, False)
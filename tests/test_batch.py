@@ -0,0 +1,44 @@
+import numpy as np
+
+from BatchModule import DetectorPool, resultShape, splitSegments
+from MotionModule import MotionGate
+
+from conftest import FakeGraph
+
+
+def test_segments_cover_every_frame_once():
+    assert splitSegments(10, 3) == [(0, 3), (3, 6), (6, 10)]
+    assert splitSegments(2, 8) == [(0, 1), (1, 2)]
+    assert splitSegments(5, 1) == [(0, 5)]
+
+
+def test_result_shape_follows_upper_body():
+    assert resultShape("face") == (5,)
+    assert resultShape("hand", {"maxHands": 4}) == (21, 3)
+    assert resultShape("pose") == (33, 3)
+    assert resultShape("pose", {"upBody": True}) == (25, 3)
+
+
+def test_pool_hands_back_warm_detectors(fakeMediapipe):
+    pool = DetectorPool()
+    detector = pool.acquire("hand")
+    assert detector.built and detector.hands.frames == 1
+    pool.release(detector)
+    # the tracking graph was closed on release and is built and warmed up again on acquire
+    assert not detector.built
+    assert pool.acquire("hand") is detector
+    assert detector.built and detector.hands.frames == 1
+    assert FakeGraph.built == 2
+
+
+def test_pool_keeps_static_graphs_and_resets_stream_state(fakeMediapipe):
+    pool = DetectorPool()
+    gate = MotionGate()
+    with pool.borrow("hand", mode=True, motionGate=gate) as detector:
+        graph = detector.hands
+        detector.findHands(np.zeros((48, 64, 3), np.uint8), draw=False)
+        assert gate._reference is not None
+    assert gate._reference is None and detector.results is None
+    # default arguments spelled out share the config of the call that left them out
+    assert pool.acquire("hand", mode=True, maxHands=2, motionGate=gate) is detector
+    assert detector.hands is graph and FakeGraph.built == 1
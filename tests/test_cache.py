@@ -0,0 +1,55 @@
+import os
+import threading
+
+import numpy as np
+
+from CacheModule import CachedLandmarks, cacheKey, writeCache
+
+
+def poseResults(frames, points=33):
+    return [np.full((frame % 2, points, 3), frame, np.float32) for frame in range(frames)]
+
+
+def test_written_entry_reads_back_per_frame(tmp_path):
+    directory = str(tmp_path / "entry")
+    writeCache(directory, poseResults(5), {"model": "pose", "params": {}})
+    cached = CachedLandmarks(directory)
+    assert len(cached) == 5
+    assert cached.counts().tolist() == [0, 1, 0, 1, 0]
+    assert (cached[3] == 3).all() and cached[3].shape == (1, 33, 3)
+    assert os.listdir(tmp_path) == ["entry"]
+
+
+def test_empty_upper_body_run_keeps_its_row_shape(tmp_path):
+    directory = str(tmp_path / "entry")
+    writeCache(directory, [np.empty((0, 25, 3), np.float32)] * 3, {"model": "pose", "params": {"upBody": True}})
+    assert CachedLandmarks(directory).values.shape == (0, 25, 3)
+
+
+def test_concurrent_writers_of_one_key_all_succeed(tmp_path):
+    directory = str(tmp_path / "entry")
+    errors = []
+
+    def write():
+        try:
+            writeCache(directory, poseResults(50), {"model": "pose", "params": {}})
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=write) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(CachedLandmarks(directory)) == 50
+    # the losers' temporary directories are gone
+    assert os.listdir(tmp_path) == ["entry"]
+
+
+def test_key_covers_segmentation():
+    key = cacheKey("hash", "pose", {"upBody": False}, 4, 30)
+    assert key == cacheKey("hash", "pose", {"upBody": False}, 4, 30)
+    assert key != cacheKey("hash", "pose", {"upBody": False}, 2, 30)
+    assert key != cacheKey("hash", "pose", {"upBody": False}, 4, 0)
+    assert key != cacheKey("hash", "pose", {"upBody": True}, 4, 30)
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from FilterModule import KalmanFilter, LandmarkFilter, OneEuroFilter
+
+
+FPS = 30
+
+
+def noisyTrack(frames=120, points=21, speed=60.0, noise=3.0, seed=0):
+    """(frames, 1, points, 2) landmarks moving at `speed` px/s along x, plus Gaussian noise"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(frames) / FPS
+    truth = np.zeros((frames, 1, points, 2), np.float32)
+    truth[..., 0] = (100 + speed * t)[:, None, None] + np.arange(points)
+    truth[..., 1] = 200
+    return t, truth, truth + rng.normal(0, noise, truth.shape).astype(np.float32)
+
+
+def rmse(a, b):
+    return float(np.sqrt(np.mean((a - b) ** 2)))
+
+
+@pytest.mark.parametrize("make", [lambda: OneEuroFilter(minCutoff=1.0, beta=0.05),
+                                  lambda: KalmanFilter(processNoise=10.0, measurementNoise=9.0)])
+def test_filters_reduce_noise_on_a_constant_velocity_track(make):
+    t, truth, measured = noisyTrack()
+    f = make()
+    filtered = np.stack([f.filter(measured[i], timestamp=t[i]) for i in range(len(t))])
+    settled = slice(FPS, None)
+    assert rmse(filtered[settled], truth[settled]) < 0.8 * rmse(measured[settled], truth[settled])
+
+
+def test_kalman_tracks_the_velocity():
+    t, truth, measured = noisyTrack(noise=0.5)
+    f = KalmanFilter(processNoise=10.0, measurementNoise=0.25)
+    for i in range(len(t)):
+        f.filter(measured[i], timestamp=t[i])
+    position, velocity = f.states[0][1:3]
+    assert np.allclose(velocity[..., 0], 60.0, atol=3.0)
+    assert np.allclose(velocity[..., 1], 0.0, atol=3.0)
+
+
+def test_first_frame_passes_through_unchanged():
+    x = np.random.default_rng(1).random((2, 21, 3)).astype(np.float32)
+    for f in (OneEuroFilter(), KalmanFilter()):
+        assert np.array_equal(f.filter(x, timestamp=0.0), x)
+
+
+@pytest.mark.parametrize("make", [OneEuroFilter, KalmanFilter])
+def test_missing_id_drops_its_state(make):
+    f = make()
+    a, b = np.zeros((1, 21, 2), np.float32), np.full((1, 21, 2), 50, np.float32)
+    f.filter(np.concatenate([a, b]), ids=[3, 7], timestamp=0.0)
+    f.filter(a, ids=[3], timestamp=0.1)
+    assert list(f.states) == [3]
+    # id 7 starts over, so its landmarks come back unfiltered
+    moved = b + 20
+    out = f.filter(np.concatenate([a, moved]), ids=[3, 7], timestamp=0.2)
+    assert np.array_equal(out[1], moved[0])
+
+
+@pytest.mark.parametrize("make", [OneEuroFilter, KalmanFilter])
+def test_ids_keep_independent_state_whatever_their_row(make):
+    t, truth, measured = noisyTrack(frames=20, seed=1)
+    other = measured[:, :, ::-1] + 300
+    together, alone = make(), make()
+    for i in range(len(t)):
+        rows = [0, 1] if i % 2 else [1, 0]
+        stacked = np.concatenate([measured[i], other[i]])[rows]
+        out = together.filter(stacked, ids=np.array(["a", "b"])[rows], timestamp=t[i])
+        expected = alone.filter(measured[i], ids=["a"], timestamp=t[i])
+        assert np.allclose(out[rows.index(0)], expected[0], atol=1e-4)
+
+
+def test_reset_one_id_or_all():
+    f = OneEuroFilter()
+    f.filter(np.zeros((2, 21, 2)), ids=[0, 1], timestamp=0.0)
+    f.reset(0)
+    assert list(f.states) == [1]
+    f.reset()
+    assert f.states == {}
+
+
+def test_base_filter_is_abstract():
+    with pytest.raises(TypeError):
+        LandmarkFilter()
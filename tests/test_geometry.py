@@ -0,0 +1,71 @@
+import importlib
+import sys
+import types
+
+import numpy as np
+import pytest
+
+import GeometryModule as gm
+from pose.PoseModule import poseDetector
+
+
+@pytest.fixture
+def handtracking(fakeMediapipe, monkeypatch):
+    """The original per-hand helpers, they take the detector as their first argument"""
+    monkeypatch.delitem(sys.modules, "gesture.handtracking", raising=False)
+    return importlib.import_module("gesture.handtracking")
+
+
+def randomLandmarks(shape, seed=0):
+    """Integer pixel landmarks, the [id, cx, cy] rows the scalar helpers work on have no fractions"""
+    return np.random.default_rng(seed).integers(0, 640, shape + (3,)).astype(np.float32)
+
+
+def lmList(landmarks):
+    return [[id, int(x), int(y)] for id, (x, y, z) in enumerate(landmarks)]
+
+
+def test_angles_match_find_angle_on_batched_input():
+    landmarks = randomLandmarks((4, 2, 33))
+    triples = list(gm.POSE_JOINTS.values())
+    batched = gm.angles(landmarks, triples)
+    assert batched.shape == (4, 2, len(triples))
+    detector = poseDetector()
+    img = np.zeros((1, 1, 3), np.uint8)
+    for index in np.ndindex(landmarks.shape[:2]):
+        detector.lmList = lmList(landmarks[index])
+        expected = [detector.findAngle(img, *triple, draw=False) for triple in triples]
+        assert batched[index] == pytest.approx(expected, abs=1e-3)
+
+
+def test_fingers_up_matches_the_hand_detector(handtracking):
+    landmarks = randomLandmarks((6, 2, 21), seed=1)
+    up = gm.fingersUp(landmarks)
+    assert up.shape == (6, 2, 5) and up.any() and not up.all()
+    for index in np.ndindex(landmarks.shape[:2]):
+        detector = types.SimpleNamespace(lmList=lmList(landmarks[index]), tipIds=list(gm.TIP_IDS))
+        assert up[index].astype(int).tolist() == handtracking.fingersUp(detector)
+
+
+def test_distances_match_find_distance(handtracking):
+    landmarks = randomLandmarks((3, 2, 21), seed=2)
+    pairs = [(4, 8), (8, 12), (0, 20)]
+    batched = gm.distances(landmarks, pairs)
+    assert batched.shape == (3, 2, 3)
+    img = np.zeros((1, 1, 3), np.uint8)
+    for index in np.ndindex(landmarks.shape[:2]):
+        detector = types.SimpleNamespace(lmList=lmList(landmarks[index]))
+        expected = [handtracking.findDistance(detector, p1, p2, img, draw=False)[0] for p1, p2 in pairs]
+        assert batched[index] == pytest.approx(expected, rel=1e-5)
+
+
+def test_pairwise_distances_and_midpoints():
+    landmarks = randomLandmarks((2, 21), seed=3)
+    ids = [4, 8, 12]
+    matrix = gm.pairwiseDistances(landmarks, ids)
+    assert matrix.shape == (2, 3, 3)
+    assert np.allclose(matrix, matrix.swapaxes(-1, -2)) and np.allclose(np.diagonal(matrix, axis1=-2, axis2=-1), 0)
+    assert matrix[:, 0, 1] == pytest.approx(gm.distances(landmarks, [(4, 8)])[:, 0])
+    middle = gm.midpoints(landmarks, [(4, 8)])
+    assert middle.shape == (2, 1, 2)
+    assert np.allclose(middle[:, 0], (landmarks[:, 4, :2] + landmarks[:, 8, :2]) / 2)
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from GestureModule import GestureEngine, GestureEvent
+
+
+def hand(fingers=(1, 1, 1, 1, 1), dx=0.0):
+    """(21, 3) synthetic hand, wrist at the bottom, one hand size (wrist to landmark 9) is 0.3"""
+    points = np.zeros((21, 3), np.float32)
+    points[0] = (0.5, 0.9, 0)
+    # thumb, up when its tip is right of the joint below it
+    thumb = [(0.60, 0.80), (0.67, 0.75), (0.72, 0.70), (0.76, 0.65)]
+    if not fingers[0]:
+        thumb[3] = (0.70, 0.66)
+    points[1:5, :2] = thumb
+    for f, x in enumerate((0.4, 0.5, 0.6, 0.7)):
+        base = 5 + 4 * f
+        ys = (0.6, 0.5, 0.45, 0.4) if fingers[f + 1] else (0.6, 0.5, 0.55, 0.65)
+        points[base:base + 4, 0] = x
+        points[base:base + 4, 1] = ys
+    points[:, 0] += dx
+    return points
+
+
+OPEN = hand()
+FIST = hand((0, 0, 0, 0, 0))
+
+
+def names(events, kind=None):
+    return sorted(event.name for event in events if kind is None or event.kind == kind)
+
+
+def test_rules_match_the_synthetic_hands():
+    engine = GestureEngine()
+    matched = engine.match(np.stack([OPEN, FIST, hand((0, 1, 0, 0, 0))]), timestamp=0.0)
+    shown = [[engine.names[g] for g in np.flatnonzero(row)] for row in matched]
+    assert shown == [["open"], ["fist"], ["point"]]
+
+
+def test_gesture_starts_after_the_hold_time_and_ends_after_release():
+    engine = GestureEngine(debounce=0.1, release=0.1)
+    assert engine.update([OPEN], [7], 0.0) == []
+    assert engine.update([OPEN], [7], 0.05) == []
+    assert engine.update([OPEN], [7], 0.1) == [GestureEvent("open", 7, "start", 0.1)]
+    assert engine.update([OPEN], [7], 0.15) == []
+    assert engine.active(7) == ["open"]
+    assert engine.update([FIST], [7], 0.2) == []
+    events = engine.update([FIST], [7], 0.35)
+    assert events == [GestureEvent("fist", 7, "start", 0.35), GestureEvent("open", 7, "end", 0.35)]
+    assert engine.active(7) == ["fist"]
+
+
+def test_flicker_shorter_than_the_hold_time_emits_nothing():
+    engine = GestureEngine(debounce=0.1)
+    events = []
+    for i, landmarks in enumerate([FIST, OPEN, FIST, OPEN, FIST]):
+        events += engine.update([landmarks], [0], i * 0.04)
+    assert names(events) == []
+    assert names(engine.update([FIST], [0], 0.26), "start") == ["fist"]
+
+
+def test_missing_hand_ends_its_gestures():
+    engine = GestureEngine(debounce=0)
+    engine.update(np.stack([OPEN, FIST]), [1, 2], 0.0)
+    assert engine.active(1) == ["open"] and engine.active(2) == ["fist"]
+    assert engine.update([FIST], [2], 0.05) == [GestureEvent("open", 1, "end", 0.05)]
+    assert engine.update(np.empty((0, 21, 3)), [], 0.1) == [GestureEvent("fist", 2, "end", 0.1)]
+    assert engine.states == {}
+
+
+def test_swipe_fires_once_the_hand_moved_far_enough_in_time():
+    engine = GestureEngine()
+    events = []
+    for i in range(5):
+        events += engine.update([hand(dx=0.15 * i)], [0], 0.1 * i)
+    # 1.5 hand sizes is 0.45, covered between t=0 and t=0.3
+    starts = [event for event in events if event.kind == "start"]
+    assert GestureEvent("swipeRight", 0, "start", pytest.approx(0.3)) in starts
+    assert "swipeLeft" not in names(events)
+
+    slow = GestureEngine()
+    events = []
+    for i in range(10):
+        events += slow.update([hand(dx=0.05 * i)], [0], 0.1 * i)
+    assert "swipeRight" not in names(events)
+
+
+def test_rule_tables_are_validated():
+    with pytest.raises(ValueError):
+        GestureEngine({})
+    with pytest.raises(ValueError):
+        GestureEngine({"wave": {"fingers": (1, 1, 1, 1, 1), "speed": 2}})
+    with pytest.raises(ValueError):
+        GestureEngine({"nothing": {"hold": 0.5}})
@@ -0,0 +1,51 @@
+import pytest
+
+from MetricsModule import Histogram, MetricsRegistry
+
+
+def test_histogram_window_keeps_the_newest_samples():
+    histogram = Histogram(size=4)
+    for value in range(10):
+        histogram.observe(value)
+    assert histogram.count == 10 and histogram.sum == 45
+    assert sorted(histogram.values) == [6, 7, 8, 9]
+
+
+def test_sampling_thins_the_window_but_not_count_and_sum():
+    registry = MetricsRegistry(sampleEvery=10, histogramSize=1024)
+    for value in range(100):
+        registry.observe("detect_seconds", value)
+    histogram = registry.histograms[("detect_seconds", ())]
+    assert histogram.count == 100
+    assert histogram.sum == sum(range(100))
+    assert histogram.sampled == 10
+    assert sorted(histogram.values[:histogram.sampled]) == list(range(0, 100, 10))
+    summary = registry.snapshot()["histograms"]["detect_seconds"]
+    assert summary["count"] == 100 and summary["sum"] == 4950
+    assert summary["p50"] == pytest.approx(45)
+
+
+def test_prometheus_text():
+    registry = MetricsRegistry(sampleEvery=2)
+    registry.inc("frames_total")
+    registry.inc("frames_total", 2)
+    registry.set("queue_depth", 3)
+    for value in (1.0, 2.0, 3.0, 4.0):
+        registry.observe("detect_seconds", value)
+    registry.inc("stream_frames_total", labels={"stream": 'rtsp://cam/"1"'})
+    lines = registry.toPrometheus().splitlines()
+    assert lines[:2] == ["# TYPE frames_total counter", "frames_total 3"]
+    assert 'stream_frames_total{stream="rtsp://cam/\\"1\\""} 1' in lines
+    assert "# TYPE queue_depth gauge" in lines and "queue_depth 3" in lines
+    assert "# TYPE detect_seconds summary" in lines
+    # every observation counts, only 1.0 and 3.0 made it into the window
+    assert "detect_seconds_sum 10.0" in lines and "detect_seconds_count 4" in lines
+    assert 'detect_seconds{quantile="0.5"} 2.0' in lines
+    assert sum(line.startswith("# TYPE") for line in lines) == 4
+
+
+def test_timer_observes_under_its_labels():
+    registry = MetricsRegistry()
+    with registry.timer("work_seconds", {"stage": "detect"}):
+        pass
+    assert registry.snapshot()["histograms"]['work_seconds{stage="detect"}']["count"] == 1
@@ -0,0 +1,62 @@
+import numpy as np
+
+from MotionModule import MotionGate
+
+
+def frame(value=0, shape=(48, 64, 3)):
+    return np.full(shape, value, np.uint8)
+
+
+def test_static_scene_runs_exactly_every_max_skip_th_frame():
+    gate = MotionGate(maxSkip=5)
+    runs = [gate.moved(frame()) for i in range(20)]
+    assert [i for i, run in enumerate(runs) if run] == [0, 5, 10, 15]
+
+
+def test_change_lets_the_frame_through_and_becomes_the_reference():
+    gate = MotionGate(threshold=0.01, pixelThreshold=25)
+    assert gate.moved(frame(0))
+    assert not gate.moved(frame(10))
+    assert gate.moved(frame(100))
+    assert not gate.moved(frame(100))
+    # small steps add up against the last frame let through
+    assert not gate.moved(frame(120))
+    assert gate.moved(frame(130))
+
+
+def test_small_local_change_below_threshold_is_skipped():
+    gate = MotionGate(threshold=0.1, width=64)
+    gate.moved(frame())
+    img = frame()
+    img[:4, :4] = 255
+    assert not gate.moved(img)
+    img[:24, :32] = 255
+    assert gate.moved(img)
+
+
+def test_skip_ratio():
+    gate = MotionGate(maxSkip=4)
+    assert gate.skipRatio == 0.0
+    for i in range(8):
+        gate.moved(frame())
+    assert gate.frames == 8 and gate.skipped == 6
+    assert gate.skipRatio == 0.75
+
+
+def test_reset_lets_the_next_frame_through():
+    gate = MotionGate()
+    gate.moved(frame())
+    assert not gate.moved(frame())
+    gate.reset()
+    assert gate.moved(frame())
+    assert not gate.moved(frame())
+
+
+def test_new_frame_shape_starts_over():
+    gate = MotionGate()
+    assert gate.moved(frame())
+    assert not gate.moved(frame())
+    assert gate.moved(frame(shape=(96, 64, 3)))
+    assert not gate.moved(frame(shape=(96, 64, 3)))
+    assert gate.moved(frame(shape=(96, 64)))
+    assert not gate.moved(frame(shape=(96, 64)))
@@ -0,0 +1,49 @@
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from BatchModule import detectorPool
+from MetricsModule import MetricsRegistry
+from OrchestratorModule import StreamOrchestrator
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (64, 48))
+    for frame in range(20):
+        writer.write(np.full((48, 64, 3), frame * 10, np.uint8))
+    writer.release()
+    return path
+
+
+def runUntilFinished(orchestrator, timeout=10):
+    deadline = time.monotonic() + timeout
+    with orchestrator:
+        while not orchestrator.finished:
+            assert time.monotonic() < deadline, "orchestrator never finished"
+            time.sleep(0.01)
+        alive = sum(thread.is_alive() for thread in orchestrator._threads)
+    return alive
+
+
+def test_failing_callback_is_counted_and_workers_survive(fakeMediapipe, video):
+    detectorPool.clear()
+    calls = []
+
+    def callback(stream, frameNo, timestamp, img, result):
+        calls.append(frameNo)
+        raise RuntimeError(f"frame {frameNo}")
+
+    metrics = MetricsRegistry()
+    orchestrator = StreamOrchestrator("hand", workers=2, metrics=metrics)
+    stream = orchestrator.add(video, callback, name="file:///tmp/clip.avi")
+    assert runUntilFinished(orchestrator) == 2
+    assert stream.processed == stream.errors == len(calls) > 0
+    assert isinstance(orchestrator.error, RuntimeError)
+    text = metrics.toPrometheus()
+    assert f'stream_errors_total{{stream="file:///tmp/clip.avi"}} {len(calls)}' in text
+    assert "file://" not in "".join(line.split("{")[0] for line in text.splitlines())
+    detectorPool.clear()
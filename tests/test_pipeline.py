@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from PipelineModule import BLOCK, DROP_OLDEST, Pipeline
+
+
+class FakeSource:
+    """Yields `frames` small frames, then either runs out or raises"""
+
+    def __init__(self, frames, error=None):
+        self.frames = frames
+        self.error = error
+        self.read_count = 0
+
+    def read(self):
+        if self.read_count == self.frames:
+            if self.error is not None:
+                raise self.error
+            return False, None
+        img = np.full((4, 4, 3), self.read_count, np.uint8)
+        self.read_count += 1
+        return True, img
+
+
+def test_results_keep_every_frame_in_order_until_the_end_of_stream():
+    pipeline = Pipeline(FakeSource(20), lambda img: int(img[0, 0, 0]), dropPolicy=BLOCK)
+    results = [(frameNo, result) for frameNo, timestamp, img, result in pipeline.results()]
+    assert results == [(i, i) for i in range(20)]
+    assert pipeline.dropped == 0
+    assert pipeline._threads == []
+
+
+def test_latest_policy_ends_with_the_last_frame():
+    pipeline = Pipeline(FakeSource(50), lambda img: int(img[0, 0, 0]), dropPolicy=DROP_OLDEST)
+    frameNos = [frameNo for frameNo, timestamp, img, result in pipeline.results()]
+    assert frameNos == sorted(frameNos)
+    assert frameNos[-1] == 49
+    assert len(frameNos) + pipeline.dropped == 50
+
+
+def test_detect_error_ends_the_stream_and_is_raised():
+    def detect(img):
+        if img[0, 0, 0] == 3:
+            raise ValueError("bad frame")
+        return None
+
+    pipeline = Pipeline(FakeSource(10), detect, dropPolicy=BLOCK)
+    frameNos = []
+    with pytest.raises(ValueError, match="bad frame"):
+        for frameNo, timestamp, img, result in pipeline.results():
+            frameNos.append(frameNo)
+    assert frameNos == [0, 1, 2]
+    assert pipeline._threads == []
+
+
+def test_source_error_is_raised_after_the_frames_before_it():
+    pipeline = Pipeline(FakeSource(5, OSError("camera gone")), lambda img: None, dropPolicy=BLOCK)
+    frameNos = []
+    with pytest.raises(OSError, match="camera gone"):
+        for frameNo, timestamp, img, result in pipeline.results():
+            frameNos.append(frameNo)
+    assert frameNos == list(range(5))
+
+
+def test_run_stops_when_render_returns_false():
+    rendered = []
+
+    def render(img, result):
+        rendered.append(result)
+        return len(rendered) < 3
+
+    source = FakeSource(1000)
+    Pipeline(source, lambda img: int(img[0, 0, 0]), render, dropPolicy=BLOCK).run()
+    assert rendered == [0, 1, 2]
+    assert source.read_count < 1000
@@ -0,0 +1,46 @@
+import time
+
+import numpy as np
+
+from pose.PoseModule import poseDetector
+from QualityModule import DEFAULT_LEVELS, QualityController
+from RenderModule import Renderer
+
+
+def test_wrapped_pose_detector_keeps_working_after_stepping_down_to_upper_body(fakeMediapipe):
+    detector = poseDetector()
+    controller = QualityController(budget=0.005, levels=DEFAULT_LEVELS, level=2, window=3)
+
+    def slowDetect(img):
+        time.sleep(0.02)
+        return detector.detect(img)
+
+    detect = controller.wrap(slowDetect, detector)
+    img = np.zeros((48, 64, 3), np.uint8)
+    renderer = Renderer()
+    shapes = []
+    for frame in range(6):
+        result = detect(img)
+        shapes.append(result.landmarks.shape)
+        assert result.visibility.shape == result.landmarks.shape[:2]
+        renderer.draw(img, [result])
+    assert controller.level == 4
+    assert detector.upBody
+    assert shapes[:3] == [(1, 33, 3)] * 3
+    assert shapes[3] == (1, 25, 3)
+
+
+def test_observe_steps_down_over_budget_and_back_up_with_headroom():
+    controller = QualityController(budget=0.01, window=2, headroom=0.5, memory=0.0)
+    assert not controller.observe(0.02)
+    assert controller.observe(0.02) and controller.level == 1
+    assert not controller.observe(0.001)
+    assert controller.observe(0.001) and controller.level == 0
+
+
+def test_skip_divides_the_measured_cost():
+    levels = [{"skip": 1}, {"skip": 4}]
+    controller = QualityController(budget=0.01, levels=levels, level=1, window=1, headroom=0.9)
+    # at skip 4 a 0.038s detection costs 0.0095s a frame: within the budget, but without headroom
+    assert not controller.observe(0.038)
+    assert controller.observe(0.02) and controller.level == 0
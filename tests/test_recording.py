@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from RecordingModule import HEADER_SIZE, RecordingReader, RecordingWriter
+
+
+def hands(frame, count=2):
+    return np.full((count, 21, 3), frame, np.float32)
+
+
+def test_frames_round_trip(tmp_path):
+    path = str(tmp_path / "hands.lmrec")
+    with RecordingWriter(path) as writer:
+        writer.write(hands(0), scores=[0.9, 0.8], timestamp=10.0)
+        writer.write(hands(1, 1), timestamp=11.0)
+        writer.write(hands(2, 5), timestamp=12.0)
+        writer.write(np.empty((0, 21, 3)), timestamp=13.0)
+    reader = RecordingReader(path)
+    assert len(reader) == 4
+    timestamp, landmarks, scores = reader[0]
+    assert timestamp == 10.0
+    assert landmarks.shape == (2, 21, 3) and (landmarks == 0).all()
+    assert scores.tolist() == pytest.approx([0.9, 0.8])
+    timestamp, landmarks, scores = reader[1]
+    assert landmarks.shape == (1, 21, 3) and np.isnan(scores).all()
+    # subjects past maxSubjects are dropped
+    assert reader[2][1].shape == (2, 21, 3)
+    assert reader[3][1].shape == (0, 21, 3)
+    assert reader.records["frameNo"].tolist() == [0, 1, 2, 3]
+
+
+def test_reopening_appends_and_continues_the_frame_numbers(tmp_path):
+    path = str(tmp_path / "hands.lmrec")
+    with RecordingWriter(path) as writer:
+        writer.write(hands(0), timestamp=0.0)
+    with RecordingWriter(path) as writer:
+        assert writer.frameNo == 1
+        writer.write(hands(1), timestamp=1.0)
+    reader = RecordingReader(path)
+    assert reader.records["frameNo"].tolist() == [0, 1]
+    assert reader.timestamps.tolist() == [0.0, 1.0]
+
+
+def test_reopening_drops_a_half_written_record(tmp_path):
+    path = str(tmp_path / "hands.lmrec")
+    with RecordingWriter(path) as writer:
+        writer.write(hands(0), timestamp=0.0)
+        writer.write(hands(1), timestamp=1.0)
+        itemsize = writer.dtype.itemsize
+    with open(path, "r+b") as f:
+        f.truncate(HEADER_SIZE + itemsize + itemsize // 2)
+    with RecordingWriter(path) as writer:
+        assert writer.frameNo == 1
+        writer.write(hands(2), timestamp=2.0)
+    reader = RecordingReader(path)
+    assert len(reader) == 2
+    assert reader.timestamps.tolist() == [0.0, 2.0]
+    assert (reader[1][1] == 2).all()
+
+
+def test_reopening_with_another_layout_fails(tmp_path):
+    path = str(tmp_path / "hands.lmrec")
+    RecordingWriter(path).close()
+    with pytest.raises(ValueError):
+        RecordingWriter(path, points=33)
+
+
+def test_refresh_and_time_range(tmp_path):
+    path = str(tmp_path / "hands.lmrec")
+    writer = RecordingWriter(path)
+    reader = RecordingReader(path)
+    assert len(reader) == 0
+    for frame in range(10):
+        writer.write(hands(frame), timestamp=float(frame))
+    writer.flush()
+    assert len(reader) == 0
+    reader.refresh()
+    assert len(reader) == 10
+    assert reader.timeRange(2.5, 6.0)["frameNo"].tolist() == [3, 4, 5]
+    writer.close()
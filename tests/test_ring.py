@@ -0,0 +1,98 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from RingModule import FrameRing
+
+
+def frame(seq):
+    return np.full((4, 6, 3), seq % 256, np.uint8)
+
+
+@pytest.fixture
+def ring():
+    ring = FrameRing.create((4, 6, 3), slots=4, maxReaders=2)
+    yield ring
+    ring.close()
+
+
+def test_frames_wrap_around_the_slots(ring):
+    for seq in range(10):
+        assert ring.write(frame(seq), timestamp=float(seq)) == seq
+    assert ring.writeSeq == 9
+    for seq in range(6):
+        assert not ring.valid(seq) and ring.frame(seq) is None
+    for seq in range(6, 10):
+        timestamp, img = ring.frame(seq)
+        assert timestamp == float(seq) and (img == seq).all()
+
+
+def test_reader_gets_every_frame_it_keeps_up_with(ring):
+    ring.write(frame(0))
+    reader = ring.reader(0)
+    assert reader.readNext() is None
+    for seq in range(1, 20):
+        ring.write(frame(seq))
+        got, timestamp, img = reader.readNext(copy=True)
+        assert got == seq and (img == seq).all()
+    assert reader.readNext() is None
+    assert reader.dropped == 0
+
+
+def test_reader_counts_the_frames_it_was_lapped_on(ring):
+    reader = ring.reader(0)
+    for seq in range(10):
+        ring.write(frame(seq))
+    # frames 0..5 were overwritten, 6..9 are still in the ring
+    assert [reader.readNext()[0] for i in range(4)] == [6, 7, 8, 9]
+    assert reader.dropped == 6
+    for seq in range(10, 15):
+        ring.write(frame(seq))
+    seq, timestamp, img = reader.readLatest()
+    assert seq == 14 and (img == 14).all()
+    assert reader.dropped == 6 + 4
+    assert reader.readNext() is None
+
+
+def test_reader_slots_are_exclusive_and_freed_on_close(ring):
+    reader = ring.reader(0)
+    with pytest.raises(ValueError):
+        ring.reader(0)
+    reader.close()
+    assert ring.slowestReader() is None
+    ring.reader(0).close()
+
+
+def test_blocking_writer_waits_for_the_slowest_reader(ring):
+    reader = ring.reader(0)
+    for seq in range(4):
+        ring.write(frame(seq), block=True)
+
+    written = []
+
+    def write():
+        written.append(ring.write(frame(4), block=True))
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    time.sleep(0.05)
+    # frame 4 would overwrite frame 0, which the reader has not read yet
+    assert written == [] and ring.writeSeq == 3
+    seqs = [reader.readNext()[0], reader.readNext()[0]]
+    writer.join(1)
+    assert seqs == [0, 1] and written == [4]
+    assert reader.dropped == 0
+
+
+def test_attaching_in_the_creating_process(ring):
+    ring.write(frame(7))
+    attached = FrameRing.attach(ring.name)
+    try:
+        assert attached.shape == ring.shape and attached.slots == ring.slots
+        timestamp, img = attached.frame(0)
+        assert (img == 7).all()
+    finally:
+        attached.close()
+    assert ring.valid(0)
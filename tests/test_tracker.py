@@ -0,0 +1,59 @@
+import numpy as np
+
+from TrackerModule import SubjectTracker, greedyAssign, landmarkBoxes
+
+
+def moving(frame):
+    """Two boxes drifting towards each other, 10 units apart on the x axis at frame 0"""
+    return [(0 + 2 * frame, 0, 10, 10), (40 - 2 * frame, 20, 10, 10)]
+
+
+def test_ids_stay_with_their_subject_when_the_detection_order_changes():
+    tracker = SubjectTracker()
+    first = tracker.update(moving(0))
+    assert first == [0, 1]
+    for frame in range(1, 6):
+        boxes = moving(frame)
+        assert tracker.update(boxes[::-1]) == first[::-1]
+        assert tracker.update(boxes) == first
+
+
+def test_centroid_metric_follows_boxes_that_no_longer_overlap():
+    tracker = SubjectTracker("centroid", threshold=1.0)
+    ids = tracker.update([(0, 0, 10, 10)])
+    for frame in range(1, 10):
+        assert tracker.update([(8 * frame, 0, 10, 10)]) == ids
+
+
+def test_track_survives_max_age_missing_frames_then_dies():
+    tracker = SubjectTracker(maxAge=2)
+    [id] = tracker.update([(0, 0, 10, 10)])
+    tracker.update([])
+    tracker.update([])
+    assert tracker.update([(1, 0, 10, 10)]) == [id]
+    for frame in range(3):
+        tracker.update([])
+    assert tracker.update([(1, 0, 10, 10)]) == [id + 1]
+
+
+def test_new_subjects_get_fresh_ids_and_history_is_kept():
+    tracker = SubjectTracker(historySize=3)
+    [a] = tracker.update([(0, 0, 10, 10)])
+    for frame in range(1, 5):
+        ids = tracker.update([(frame, 0, 10, 10), (100, 100, 10, 10)])
+    assert ids[0] == a and ids[1] not in (a, None)
+    assert [frameNo for frameNo, box in tracker.history(a)] == [2, 3, 4]
+    assert tracker.history(99) == []
+
+
+def test_greedy_assign_takes_the_best_pairs_first():
+    score = np.array([[0.9, 0.8], [0.85, 0.1]])
+    assert sorted(greedyAssign(score, 0.5)) == [(0, 0)]
+    assert sorted(greedyAssign(score, 0.05)) == [(0, 0), (1, 1)]
+    assert greedyAssign(np.empty((0, 3)), 0.5) == []
+
+
+def test_landmark_boxes():
+    boxes = landmarkBoxes([[(1, 2), (4, 6), (2, 3)]])
+    assert boxes.tolist() == [[1, 2, 3, 4]]
+    assert landmarkBoxes([]).shape == (0, 4)